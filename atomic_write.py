@@ -0,0 +1,32 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_open(path, mode="wb", encoding=None, permissions=None):
+    """
+    書き込み用に開いたファイルを返し、正常に閉じたときだけpathを置き換える
+
+    同じディレクトリの一時ファイルに書き込んでからrenameするため、読み手が
+    書きかけのファイルを読むことはなく、途中で失敗した場合は一時ファイルを削除する。
+    permissionsを指定すると置き換える前に権限を設定する（mkstempは0600で作成するため、
+    Pagesなどで公開するファイルは0o644を指定する）。
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        if permissions is not None:
+            os.chmod(tmp_path, permissions)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_atomic(path, data, permissions=None):
+    """バイト列をpathにアトミックに書き込む"""
+    with atomic_open(path, "wb", permissions=permissions) as f:
+        f.write(data)
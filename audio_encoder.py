@@ -0,0 +1,114 @@
+import os
+import shutil
+import subprocess
+import time
+import wave
+
+
+# 形式ごとの拡張子・エンクロージャのMIMEタイプ・ffmpegのエンコーダ設定
+AUDIO_FORMATS = {
+    "wav": {"ext": ".wav", "mime": "audio/wav", "codec": None},
+    "mp3": {"ext": ".mp3", "mime": "audio/mpeg", "codec": ["-c:a", "libmp3lame"], "bitrate": "64k"},
+    "opus": {"ext": ".opus", "mime": "audio/ogg", "codec": ["-c:a", "libopus"], "bitrate": "32k"},
+    "flac": {"ext": ".flac", "mime": "audio/flac", "codec": ["-c:a", "flac"], "bitrate": None},
+}
+
+AUDIO_EXTENSIONS = tuple(fmt["ext"] for fmt in AUDIO_FORMATS.values())
+
+
+def audio_mime_type(path):
+    """ファイルの拡張子からエンクロージャ用のMIMEタイプを返す"""
+    ext = os.path.splitext(path)[1].lower()
+    for fmt in AUDIO_FORMATS.values():
+        if fmt["ext"] == ext:
+            return fmt["mime"]
+    return "application/octet-stream"
+
+
+class AudioEncoder:
+    """
+    WAVを圧縮形式（MP3/Opus/FLAC）に変換するエンコードステージ
+
+    WAVのPCMをブロック単位でffmpegの標準入力に流し込んでエンコードする。
+    """
+
+    def __init__(self, audio_format="wav", bitrate=None, block_size=1024 * 1024):
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"未対応の音声形式です: {audio_format}")
+        self.audio_format = audio_format
+        self.bitrate = bitrate or AUDIO_FORMATS[audio_format].get("bitrate")
+        self.block_size = block_size
+
+    def is_available(self):
+        """エンコーダ（ffmpeg）が利用可能か確認"""
+        return shutil.which("ffmpeg") is not None
+
+    def build_command(self, sample_rate, num_channels, sample_width, output_path):
+        """ffmpegのコマンドラインを作成"""
+        fmt = AUDIO_FORMATS[self.audio_format]
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", f"s{sample_width * 8}le", "-ar", str(sample_rate), "-ac", str(num_channels),
+            "-i", "pipe:0",
+        ]
+        command += fmt["codec"]
+        if self.bitrate:
+            command += ["-b:a", self.bitrate]
+        command.append(output_path)
+        return command
+
+    def encode(self, wav_path):
+        """
+        WAVファイルをエンコードし、出力ファイルのパスを返す
+
+        WAV形式の指定時やエンコーダが使えない場合は元のファイルをそのまま返す。
+        """
+        if self.audio_format == "wav":
+            return wav_path
+
+        if not self.is_available():
+            print("⚠️ ffmpegが見つからないため、WAVのまま公開します")
+            return wav_path
+
+        print(f"🗜️ 音声を{self.audio_format.upper()}にエンコード中...")
+        base, ext = os.path.splitext(wav_path)[0], AUDIO_FORMATS[self.audio_format]["ext"]
+        output_path = base + ext
+        # ffmpegは拡張子で出力形式を判定するため、拡張子を残した隠しファイルに書き出す
+        part_path = os.path.join(os.path.dirname(base), f".{os.path.basename(base)}.part{ext}")
+
+        start = time.perf_counter()
+        with wave.open(wav_path, "rb") as wav:
+            command = self.build_command(
+                wav.getframerate(), wav.getnchannels(), wav.getsampwidth(), part_path
+            )
+            frames_per_block = max(1, self.block_size // (wav.getsampwidth() * wav.getnchannels()))
+            duration = wav.getnframes() / wav.getframerate()
+
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            try:
+                while True:
+                    block = wav.readframes(frames_per_block)
+                    if not block:
+                        break
+                    process.stdin.write(block)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            stderr = process.stderr.read()
+            process.wait()
+
+        if process.returncode != 0:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise RuntimeError(f"エンコードに失敗しました: {stderr.decode(errors='replace').strip()}")
+
+        os.replace(part_path, output_path)
+        elapsed = time.perf_counter() - start
+
+        wav_size = os.path.getsize(wav_path)
+        encoded_size = os.path.getsize(output_path)
+        print(f"✅ エンコード完了: {output_path}")
+        print(f"📊 {wav_size / 1024 / 1024:.2f} MB → {encoded_size / 1024 / 1024:.2f} MB "
+              f"(圧縮率 {wav_size / max(encoded_size, 1):.1f}x, "
+              f"エンコード {elapsed:.2f}秒, {duration / max(elapsed, 1e-9):.0f}x 実時間)")
+        return output_path
@@ -0,0 +1,176 @@
+import os
+import struct
+
+
+# MPEGオーディオのビットレート表（kbps） [MPEG-1 / MPEG-2/2.5][レイヤー]
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def wav_duration(f, file_size):
+    """RIFFのfmt/dataチャンクのサイズから再生時間を計算"""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        return None
+
+    byte_rate = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            fmt = f.read(chunk_size)
+            byte_rate = struct.unpack("<I", fmt[8:12])[0]
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # ストリーミング書き込み途中などでサイズ未確定の場合はファイルサイズから推定
+            if chunk_size in (0, 0xFFFFFFFF):
+                chunk_size = file_size - f.tell()
+            return chunk_size / byte_rate
+        else:
+            f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def mp3_duration(f, file_size):
+    """MP3の先頭フレームヘッダー（Xing/Info/VBRIがあればそのフレーム数）から再生時間を計算"""
+    head = f.read(10)
+    offset = 0
+    if head[:3] == b"ID3":
+        size = head[6] << 21 | head[7] << 14 | head[8] << 7 | head[9]
+        offset = 10 + size + (10 if head[5] & 0x10 else 0)
+    f.seek(offset)
+
+    data = f.read(64 * 1024)
+    for i in range(len(data) - 4):
+        if data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+            continue
+        b1, b2, b3 = data[i + 1], data[i + 2], data[i + 3]
+        version_bits = b1 >> 3 & 0x03
+        layer_bits = b1 >> 1 & 0x03
+        bitrate_index = b2 >> 4
+        rate_index = b2 >> 2 & 0x03
+        if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+
+        version = 1 if version_bits == 3 else 2
+        layer = 4 - layer_bits
+        bitrate = MP3_BITRATES[(version, layer)][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+        mono = b3 >> 6 == 3
+        if layer == 1:
+            samples_per_frame = 384
+        elif layer == 3 and version == 2:
+            samples_per_frame = 576
+        else:
+            samples_per_frame = 1152
+
+        # Xing/Info（VBR）ヘッダー
+        side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+        xing = i + 4 + side_info
+        if data[xing:xing + 4] in (b"Xing", b"Info"):
+            flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+            if flags & 0x01:
+                frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+                return frames * samples_per_frame / sample_rate
+
+        # VBRIヘッダー
+        vbri = i + 4 + 32
+        if data[vbri:vbri + 4] == b"VBRI":
+            frames = struct.unpack(">I", data[vbri + 14:vbri + 18])[0]
+            return frames * samples_per_frame / sample_rate
+
+        # CBRとしてファイルサイズから計算
+        return (file_size - offset - i) * 8 / bitrate
+    return None
+
+
+def flac_duration(f, file_size):
+    """FLACのSTREAMINFOブロックの総サンプル数から再生時間を計算"""
+    if f.read(4) != b"fLaC":
+        return None
+    header = f.read(4)
+    if len(header) < 4 or header[0] & 0x7F != 0:
+        return None
+    info = f.read(34)
+    if len(info) < 34:
+        return None
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def ogg_opus_duration(f, file_size):
+    """Ogg Opusの最終ページのグラニュール位置とプリスキップから再生時間を計算"""
+    first = f.read(512)
+    if first[:4] != b"OggS":
+        return None
+    head = first.find(b"OpusHead")
+    if head < 0:
+        return None
+    pre_skip = struct.unpack("<H", first[head + 10:head + 12])[0]
+
+    tail_size = min(file_size, 64 * 1024)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    page = tail.rfind(b"OggS")
+    while page >= 0:
+        if len(tail) >= page + 14:
+            granule = struct.unpack("<q", tail[page + 6:page + 14])[0]
+            if granule >= 0:
+                return max(0, granule - pre_skip) / 48000
+        page = tail.rfind(b"OggS", 0, page)
+    return None
+
+
+DURATION_READERS = {
+    ".wav": wav_duration,
+    ".mp3": mp3_duration,
+    ".flac": flac_duration,
+    ".opus": ogg_opus_duration,
+    ".ogg": ogg_opus_duration,
+}
+
+
+def get_audio_duration(path):
+    """
+    音声ファイルの再生時間（秒）をヘッダー情報のみから取得
+
+    音声データ本体の読み込みやデコードは行わない。取得できない場合はNone。
+    """
+    reader = DURATION_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            return reader(f, file_size)
+    except (OSError, struct.error, ZeroDivisionError):
+        return None
+
+
+def format_duration(seconds):
+    """秒数をitunes:duration形式（MM:SS または HH:MM:SS）に変換"""
+    total = int(round(seconds))
+    hours, remainder = divmod(total, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
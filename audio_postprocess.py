@@ -0,0 +1,253 @@
+import os
+import time
+import wave
+
+try:
+    import numpy as np
+except ImportError:  # numpyがない環境では後処理を行わない
+    np = None
+
+from wav_writer import WavWriter
+
+
+def _biquad_power(b, a, w):
+    """双二次フィルタの角周波数wにおけるパワー応答 |H|^2"""
+    z = np.exp(-1j * w)
+    h = (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+    return np.abs(h) ** 2
+
+
+def k_weighting_power(freqs, sample_rate):
+    """
+    ITU-R BS.1770のK特性（高域シェルフ + 高域通過）のパワー応答
+
+    係数は48kHzの規定値と同じ特性になるよう、サンプルレートに合わせて算出する。
+    """
+    w = 2 * np.pi * freqs / sample_rate
+
+    # 高域シェルフ（+4dB, 1.5kHz）
+    gain, q, fc = 4.0, 1 / np.sqrt(2), 1500.0
+    amp = 10 ** (gain / 40)
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0, sqrt_amp = np.cos(w0), np.sqrt(amp)
+    shelf = _biquad_power(
+        [amp * ((amp + 1) + (amp - 1) * cos_w0 + 2 * sqrt_amp * alpha),
+         -2 * amp * ((amp - 1) + (amp + 1) * cos_w0),
+         amp * ((amp + 1) + (amp - 1) * cos_w0 - 2 * sqrt_amp * alpha)],
+        [(amp + 1) - (amp - 1) * cos_w0 + 2 * sqrt_amp * alpha,
+         2 * ((amp - 1) - (amp + 1) * cos_w0),
+         (amp + 1) - (amp - 1) * cos_w0 - 2 * sqrt_amp * alpha],
+        w,
+    )
+
+    # 高域通過（38Hz）
+    q, fc = 0.5, 38.0
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    highpass = _biquad_power(
+        [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2],
+        [1 + alpha, -2 * cos_w0, 1 - alpha],
+        w,
+    )
+    return shelf * highpass
+
+
+def integrated_loudness(segment_power):
+    """
+    100msごとのK特性の平均パワーから統合ラウドネス（LUFS）を計算（BS.1770のゲート付き）
+
+    400msのブロック（75%重複）ごとのラウドネスに絶対ゲート（-70 LUFS）と
+    相対ゲート（-10 LU）をかけて平均する。短すぎる・無音の場合はNone。
+    """
+    if len(segment_power) < 4:
+        return None
+    blocks = np.lib.stride_tricks.sliding_window_view(segment_power, 4).mean(axis=1)
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(blocks)
+    gated = loudness > -70
+    if not gated.any():
+        return None
+    relative = -0.691 + 10 * np.log10(blocks[gated].mean()) - 10
+    gated &= loudness > relative
+    return float(-0.691 + 10 * np.log10(blocks[gated].mean()))
+
+
+class AudioPostProcessor:
+    """
+    WAVの後処理ステージ（ラウドネス正規化・ピークリミッター・無音の短縮）
+
+    16bitのPCMをブロック単位で読み込み、int16のビューのままnumpyでまとめて処理する
+    （サンプルごとのPythonのループはない）。メモリ使用量は音声の長さによらず一定。
+
+    1. 1パス目: 100msごとにFFTでK特性をかけた平均パワーを求め、統合ラウドネスを測定
+    2. 2パス目: 目標ラウドネスとの差のゲインをかけ、10msのフレームごとに
+       ピークが上限を超えないゲインを求めて先読み・リリース付きで滑らかに適用し、
+       max_silence秒を超える無音を短縮して書き出す
+    """
+
+    def __init__(self, target_lufs=-16.0, peak_ceiling_db=-1.0, max_silence=0.7,
+                 silence_threshold_db=-50.0, max_gain_db=20.0, release_seconds=0.1,
+                 block_seconds=10.0):
+        self.target_lufs = target_lufs
+        self.peak_ceiling_db = peak_ceiling_db
+        self.max_silence = max_silence
+        self.silence_threshold_db = silence_threshold_db
+        self.max_gain_db = max_gain_db
+        self.release_seconds = release_seconds
+        self.block_seconds = block_seconds
+
+    @classmethod
+    def from_env(cls):
+        """
+        環境変数 PODCAST_LOUDNESS_TARGET（LUFS）/ PODCAST_PEAK_CEILING（dBFS）/
+        PODCAST_MAX_SILENCE（秒）から作成。PODCAST_POSTPROCESS=0 の場合はNone
+        """
+        if os.environ.get("PODCAST_POSTPROCESS", "1") in ("0", "false"):
+            return None
+        return cls(
+            target_lufs=float(os.environ.get("PODCAST_LOUDNESS_TARGET", "-16")),
+            peak_ceiling_db=float(os.environ.get("PODCAST_PEAK_CEILING", "-1")),
+            max_silence=float(os.environ.get("PODCAST_MAX_SILENCE", "0.7")),
+        )
+
+    def is_available(self):
+        """後処理（numpy）が利用可能か確認"""
+        return np is not None
+
+    def measure_loudness(self, wav):
+        """WAV全体の統合ラウドネス（LUFS）を測定"""
+        rate = wav.getframerate()
+        segment = rate // 10
+        # rfftのパワーから平均二乗値を求める重み（パーセバルの定理、両端以外のビンは2倍）
+        weights = k_weighting_power(np.fft.rfftfreq(segment, 1 / rate), rate)
+        weights[1:(segment + 1) // 2] *= 2
+        weights /= segment * segment
+
+        segments_per_block = max(1, int(self.block_seconds * 10))
+        powers = []
+        wav.rewind()
+        while True:
+            data = wav.readframes(segment * segments_per_block)
+            samples = np.frombuffer(data, dtype="<i2")
+            usable = len(samples) // segment * segment
+            if not usable:
+                break
+            segments = samples[:usable].reshape(-1, segment) / 32768.0
+            spectrum = np.fft.rfft(segments, axis=1)
+            powers.append((spectrum.real ** 2 + spectrum.imag ** 2) @ weights)
+        if not powers:
+            return None
+        return integrated_loudness(np.concatenate(powers))
+
+    def _limiter_gain(self, samples, frame, release_frames, ceiling):
+        """
+        ピークがceilingを超えないサンプルごとのゲイン
+
+        フレームごとに必要なゲインを前後1フレームの最小値（先読み）にし、
+        release_framesかけて1に戻るよう直前のフレームの値からの傾きで制限する。
+        フレームの中心の間を線形補間しても、どのサンプルでも必要なゲイン以下になる。
+        """
+        num_frames = -(-len(samples) // frame)
+        padded = np.zeros(num_frames * frame, dtype=np.float32)
+        padded[:len(samples)] = np.abs(samples)
+        peaks = padded.reshape(num_frames, frame).max(axis=1)
+        required = np.minimum(1.0, ceiling / np.maximum(peaks, 1e-9))
+
+        extended = np.pad(required, 1, constant_values=1.0)
+        gain = np.minimum(np.minimum(extended[:-2], extended[1:-1]), extended[2:])
+        released = gain.copy()
+        for k in range(1, release_frames + 1):
+            shifted = np.full_like(gain, 1.0)
+            shifted[k:] = gain[:-k] + k / release_frames
+            np.minimum(released, shifted, out=released)
+
+        centers = np.arange(num_frames) * frame + (frame - 1) / 2
+        return np.interp(np.arange(len(samples)), centers, released).astype(np.float32)
+
+    def process(self, wav_path):
+        """
+        WAVファイルを後処理して置き換え、測定値の辞書を返す
+
+        numpyがない場合や16bitのPCM以外の場合はそのままにしてNoneを返す。
+        """
+        if not self.is_available():
+            print("⚠️ numpyが見つからないため、音声の後処理をスキップします")
+            return None
+
+        start = time.perf_counter()
+        with wave.open(wav_path, "rb") as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                print("⚠️ 16bitモノラル以外の音声のため、後処理をスキップします")
+                return None
+            rate = wav.getframerate()
+            total = wav.getnframes()
+            print("🎚️ 音声を後処理中（ラウドネス正規化・リミッター・無音の短縮）...")
+            input_lufs = self.measure_loudness(wav)
+
+        gain_db = 0.0
+        if input_lufs is not None:
+            gain_db = max(-self.max_gain_db, min(self.max_gain_db, self.target_lufs - input_lufs))
+        scale = 10 ** (gain_db / 20) / 32768.0
+        ceiling = 10 ** (self.peak_ceiling_db / 20)
+        threshold = 10 ** (self.silence_threshold_db / 20)
+
+        frame = max(1, rate // 100)
+        release_frames = max(1, round(self.release_seconds * 100))
+        max_silent_frames = round(self.max_silence * 100)
+        block = max(1, int(self.block_seconds * 100)) * frame
+        # リミッターの先読み（1フレーム）とリリース（release_frames + 1フレーム）分を重ねて読む
+        before = (release_frames + 1) * frame
+        after = frame
+
+        silent_run = 0
+        limited_frames = 0
+        written = 0
+        # 読み込みを閉じてから置き換えるよう、書き込み側を外側にする
+        with WavWriter(wav_path, sample_rate=rate) as writer:
+            with wave.open(wav_path, "rb") as wav:
+                for position in range(0, total, block):
+                    read_start = max(0, position - before)
+                    read_end = min(total, position + block + after)
+                    wav.setpos(read_start)
+                    samples = np.frombuffer(wav.readframes(read_end - read_start), dtype="<i2")
+
+                    scaled = samples * np.float32(scale)
+                    gain = self._limiter_gain(scaled, frame, release_frames, ceiling)
+                    offset = position - read_start
+                    length = min(block, total - position)
+                    output = scaled[offset:offset + length] * gain[offset:offset + length]
+                    limited_frames += int((gain[offset:offset + length:frame] < 1.0).sum())
+
+                    # 10msのフレームごとに無音を判定し、続く無音の最初のmax_silence秒だけ残す
+                    num_frames = -(-length // frame)
+                    padded = np.zeros(num_frames * frame, dtype=np.float32)
+                    padded[:length] = np.abs(output)
+                    silent = padded.reshape(num_frames, frame).max(axis=1) < threshold
+                    index = np.arange(num_frames)
+                    last_sound = np.maximum.accumulate(np.where(silent, -1, index))
+                    run = index - last_sound + np.where(last_sound < 0, silent_run, 0)
+                    keep = ~silent | (run <= max_silent_frames)
+                    silent_run = int(run[-1]) if silent[-1] else 0
+
+                    output = output[np.repeat(keep, frame)[:length]]
+                    pcm = np.clip(np.rint(output * 32768.0), -32768, 32767).astype("<i2")
+                    writer.write(pcm.view(np.uint8))
+                    written += len(pcm)
+
+        elapsed = time.perf_counter() - start
+        duration = total / rate
+        result = {
+            "input_lufs": round(input_lufs, 2) if input_lufs is not None else None,
+            "gain_db": round(gain_db, 2),
+            "limited_seconds": limited_frames * frame / rate,
+            "silence_removed_seconds": (total - written) / rate,
+        }
+        if input_lufs is None:
+            loudness = "ラウドネスを測定できないため音量はそのまま"
+        else:
+            loudness = f"{input_lufs:.1f} LUFS → {self.target_lufs:.1f} LUFS ({gain_db:+.1f} dB)"
+        print(f"✅ 後処理完了: {loudness}, 無音を{result['silence_removed_seconds']:.1f}秒短縮 "
+              f"({duration / max(elapsed, 1e-9):.0f}x 実時間)")
+        return result
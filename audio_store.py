@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+
+from episode_catalog import file_sha256
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# Linuxのioctl FICLONE（btrfs/XFSなどでデータブロックを共有するコピー）
+FICLONE = 0x40049409
+
+# ファイル名に使うハッシュの桁数（16進）
+HASH_NAME_LENGTH = 16
+
+
+def content_filename(content_hash, source_path):
+    """コンテンツのハッシュと元ファイルの拡張子から保存用のファイル名を作成"""
+    ext = os.path.splitext(source_path)[1].lower()
+    return f"{content_hash[:HASH_NAME_LENGTH]}{ext}"
+
+
+def _reflink(source, destination):
+    """reflinkでコピー（対応していないファイルシステムではOSError）"""
+    if fcntl is None:
+        raise OSError("reflinkに対応していません")
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+class AudioStore:
+    """
+    docs/audio のコンテンツアドレス方式のストア
+
+    音声ファイルを内容のSHA-256から決まる名前で保存する。同じ内容が保存済みなら
+    何もせず、未保存ならハードリンク → reflink → コピーの順に試して配置する。
+    ハードリンクやreflinkではデータブロックを共有するため、ディスク上に
+    エピソードが二重に置かれない。公開後の再実行（pushの失敗後など）でも
+    同じファイル名になるため、重複してコピー・コミットされない。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def store(self, source, content_hash=None):
+        """
+        音声ファイルを保存し、(ファイル名, 配置方法) を返す
+
+        content_hashを省略した場合はファイルから計算する。
+        配置方法は "existing" / "hardlink" / "reflink" / "copy" のいずれか。
+        """
+        if content_hash is None:
+            content_hash = file_sha256(source)
+        filename = content_filename(content_hash, source)
+        destination = self.path_for(filename)
+
+        if os.path.exists(destination) and os.path.getsize(destination) == os.path.getsize(source):
+            return filename, "existing"
+
+        # 途中で失敗しても不完全なファイルが残らないよう、一時ファイルを経由して配置
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        os.close(fd)
+        os.remove(tmp_path)
+        try:
+            try:
+                os.link(source, tmp_path)
+                method = "hardlink"
+            except OSError:
+                try:
+                    _reflink(source, tmp_path)
+                    method = "reflink"
+                except OSError:
+                    shutil.copy2(source, tmp_path)
+                    method = "copy"
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, destination)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return filename, method
@@ -0,0 +1,121 @@
+"""
+フィード解析のベンチマーク
+BeautifulSoup(..., 'xml') による従来の解析と、
+feed_parser.parse_feed_items によるストリーミング解析を比較します
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from feed_parser import parse_feed_items
+
+
+def make_sample_feed(num_items):
+    """Google News検索結果に近い構造の大きなサンプルフィードを生成"""
+    items = []
+    for i in range(num_items):
+        items.append(
+            "<item>"
+            f"<title>AI関連ニュース {i} - 生成AIの最新動向 - Example News</title>"
+            f"<link>https://news.google.com/rss/articles/CBMi{i:08d}?oc=5</link>"
+            f"<guid isPermaLink=\"false\">CBMi{i:08d}</guid>"
+            "<pubDate>Sun, 09 Nov 2025 01:43:45 GMT</pubDate>"
+            "<description><![CDATA[<a href=\"https://example.com/\">"
+            + "生成AIに関する詳細な記事の概要。" * 20
+            + "</a>]]></description>"
+            "<source url=\"https://example.com\">Example News</source>"
+            "</item>"
+        )
+    return (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+        "<rss version=\"2.0\"><channel><title>AI - Google ニュース</title>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def make_sample_rdf_feed(num_items):
+    """RSS 1.0（RDF）形式のサンプルフィードを生成（itemなどは既定の名前空間に属する）"""
+    items = []
+    for i in range(num_items):
+        items.append(
+            f"<item rdf:about=\"https://example.jp/news/{i}\">"
+            f"<title>AI関連ニュース {i} - 国内メディア</title>"
+            f"<link>https://example.jp/news/{i}</link>"
+            "<description>" + "国内の生成AIに関する記事の概要。" * 20 + "</description>"
+            "<dc:date>2025-11-09T10:43:45+09:00</dc:date>"
+            "</item>"
+        )
+    return (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+        "<rdf:RDF xmlns=\"http://purl.org/rss/1.0/\""
+        " xmlns:rdf=\"http://www.w3.org/1999/02/22-rdf-syntax-ns#\""
+        " xmlns:dc=\"http://purl.org/dc/elements/1.1/\">"
+        "<channel rdf:about=\"https://example.jp/\"><title>AI - 国内ニュース</title></channel>"
+        + "".join(items)
+        + "</rdf:RDF>"
+    ).encode("utf-8")
+
+
+def parse_with_beautifulsoup(content, limit=3):
+    """従来のBeautifulSoupによる解析（比較用）"""
+    soup = BeautifulSoup(content, 'xml')
+    items = soup.find_all('item')[:limit]
+    news_items = []
+    for item in items:
+        title = item.find('title').text if item.find('title') else ""
+        description = item.find('description').text if item.find('description') else ""
+        link = item.find('link').text if item.find('link') else ""
+        news_items.append({'title': title, 'description': description, 'link': link})
+    return news_items
+
+
+def measure(func, content, repeat):
+    """最良の実行時間(秒)を返す"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print("=" * 50)
+    print("⏱️ フィード解析ベンチマーク")
+    print("=" * 50)
+
+    for num_items, make_feed, label in (
+        (100, make_sample_feed, "RSS 2.0"),
+        (1000, make_sample_feed, "RSS 2.0"),
+        (10000, make_sample_feed, "RSS 2.0"),
+        (1000, make_sample_rdf_feed, "RSS 1.0/RDF"),
+    ):
+        content = make_feed(num_items)
+        repeat = 3 if num_items >= 10000 else 10
+
+        # 結果が一致することを確認
+        expected = parse_with_beautifulsoup(content)
+        actual = parse_feed_items(content)
+        assert len(actual) == len(expected), f"{label}: 件数が一致しません"
+        for old, new in zip(expected, actual):
+            assert all(old[key] == new[key] for key in old)
+
+        bs_time = measure(parse_with_beautifulsoup, content, repeat)
+        stream_time = measure(parse_feed_items, content, repeat)
+
+        print(f"📄 {label} {num_items}件 ({len(content) / 1024 / 1024:.2f} MB)")
+        print(f"   BeautifulSoup: {bs_time * 1000:.2f} ms")
+        print(f"   ストリーミング: {stream_time * 1000:.2f} ms")
+        print(f"   高速化: {bs_time / stream_time:.1f}x")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
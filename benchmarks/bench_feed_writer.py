@@ -0,0 +1,108 @@
+"""
+RSSフィード更新のベンチマーク
+フィード全体をパース・整形し直す従来の方式と、
+feed_writer.FeedStore による差分更新を、大きなバックカタログで比較します
+"""
+
+import os
+import sys
+import tempfile
+import time
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_writer import FeedStore
+from update_rss import RSSUpdater
+
+ITUNES_NS = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+
+
+def make_item(i):
+    """ベンチマーク用のエピソード要素を作成"""
+    item = ET.Element("item")
+    ET.SubElement(item, "title").text = f"AIニュースポッドキャスト - エピソード{i}"
+    ET.SubElement(item, "description").text = "今日の最新AIニュースをお届けします。" * 10
+    ET.SubElement(item, "pubDate").text = "Sun, 09 Nov 2025 01:43:45 +0000"
+    enclosure = ET.SubElement(item, "enclosure")
+    enclosure.set("url", f"https://example.github.io/ai-podcast-generator/audio/podcast_{i:06d}.mp3")
+    enclosure.set("type", "audio/mpeg")
+    enclosure.set("length", "2400000")
+    guid = ET.SubElement(item, "guid")
+    guid.set("isPermaLink", "false")
+    guid.text = f"example/ai-podcast-generator-{i:06d}"
+    ET.SubElement(item, f"{ITUNES_NS}duration").text = "05:00"
+    return item
+
+
+def legacy_update(updater, rss_file, item):
+    """従来の方式: フィード全体をパースし、整形し直して書き出す"""
+    tree = ET.parse(rss_file)
+    root = tree.getroot()
+    updater.ensure_required_fields(root)
+    root.find("channel").append(item)
+    updater.indent(root)
+    tree.write(rss_file, encoding="utf-8", xml_declaration=True)
+
+
+def incremental_update(store, rss_file, item):
+    """差分更新: 断片を追記してストリーミングで書き出す"""
+    store.append_item(item)
+    store.write_feed(rss_file)
+
+
+def main():
+    print("=" * 50)
+    print("⏱️ RSSフィード更新ベンチマーク")
+    print("=" * 50)
+
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            run_benchmarks(workdir)
+        finally:
+            os.chdir(original_dir)
+
+    print("=" * 50)
+
+
+def run_benchmarks(workdir):
+    """件数ごとに従来の方式と差分更新を計測"""
+    updater = RSSUpdater("example/ai-podcast-generator")
+
+    for num_items in (100, 1000, 10000):
+        root = updater.create_base_rss()
+        channel = root.find("channel")
+        for i in range(num_items):
+            channel.append(make_item(i))
+
+        legacy_file = os.path.join(workdir, f"legacy_{num_items}.xml")
+        updater.indent(root)
+        ET.ElementTree(root).write(legacy_file, encoding="utf-8", xml_declaration=True)
+
+        store = FeedStore(os.path.join(workdir, f"state_{num_items}"))
+        store.rebuild(root)
+        incremental_file = os.path.join(workdir, f"incremental_{num_items}.xml")
+
+        start = time.perf_counter()
+        legacy_update(updater, legacy_file, make_item(num_items))
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        incremental_update(store, incremental_file, make_item(num_items))
+        incremental_time = time.perf_counter() - start
+
+        # 両方式の出力が一致することを確認（ルート要素の名前空間宣言の行は除く）
+        with open(legacy_file, "rb") as f1, open(incremental_file, "rb") as f2:
+            assert f1.read().split(b"\n", 2)[2].rstrip() == f2.read().split(b"\n", 2)[2].rstrip()
+
+        size = os.path.getsize(incremental_file)
+        print(f"📄 {num_items}件 ({size / 1024 / 1024:.2f} MB)")
+        print(f"   従来の方式: {legacy_time * 1000:.2f} ms")
+        print(f"   差分更新: {incremental_time * 1000:.2f} ms")
+        print(f"   高速化: {legacy_time / incremental_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
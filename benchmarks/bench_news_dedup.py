@@ -0,0 +1,120 @@
+"""
+ニュースの重複判定のしきい値の確認
+媒体の異なる同じニュースの組（重複として除外したい）と、
+同じ分野の別のニュースの組（残したい）について news_dedup のJaccard係数を計測し、
+StoryIndexのしきい値での検出数・誤検出数と、履歴の読み込み時間を表示します
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_dedup import StoryIndex, jaccard, story_shingles
+
+# 同じニュースを別の媒体が報じたタイトルの組（Google Newsの「 - 媒体名」付き）
+SAME_STORY_PAIRS = [
+    ("OpenAI、新モデル「GPT-5」を発表　推論能力が大幅に向上 - 日本経済新聞",
+     "OpenAIがGPT-5を公開、数学やコーディングで性能向上 - ITmedia"),
+    ("ソフトバンクとOpenAI、合弁会社「SB OpenAI Japan」を設立 - 日経",
+     "ソフトバンクG、OpenAIと新会社　企業向けAIを国内展開 - 朝日新聞"),
+    ("政府、AI推進法案を閣議決定　開発企業に調査協力を要請 - NHK",
+     "AI法案を閣議決定　悪質事業者の公表も可能に - 読売新聞"),
+    ("NVIDIAの決算、売上高が過去最高　データセンター向けGPUが好調 - ロイター",
+     "NVIDIA、売上高最高を更新　AI向けGPUの需要旺盛 - 日経"),
+    ("Google、生成AI「Gemini 2.5」を発表 - ケータイWatch",
+     "グーグルが「Gemini 2.5」公開　思考型の最新AIモデル - Impress"),
+    ("楽天、独自の日本語LLM「Rakuten AI 2.0」を公開 - ZDNET",
+     "楽天グループが日本語大規模言語モデル「Rakuten AI 2.0」をオープン化 - ITmedia"),
+    ("NTT、軽量LLM「tsuzumi」の商用提供を開始 - 日経クロステック",
+     "NTTの国産生成AI「tsuzumi」、法人向けに提供開始 - 毎日新聞"),
+    ("Apple、「Apple Intelligence」の日本語対応を開始 - Impress Watch",
+     "Apple Intelligenceが日本語に対応　iOS 18.4で - ITmedia"),
+    ("東京大学などが医療向け生成AIを開発、画像診断を支援 - 日経",
+     "東大、医療特化の生成AIを開発　画像診断を支援 - 共同通信"),
+    ("OpenAI launches GPT-5, its most capable model yet - The Verge",
+     "OpenAI unveils GPT-5 with improved reasoning and coding - Reuters"),
+    ("Anthropic raises $13 billion at $183 billion valuation - TechCrunch",
+     "Anthropic closes $13B funding round, valued at $183B - CNBC"),
+    ("Meta hires Apple's top AI models executive - Bloomberg",
+     "Apple's head of AI models leaves for Meta - The Information"),
+    ("Nvidia reports record revenue as AI chip demand soars - CNBC",
+     "Nvidia's data center revenue hits record on AI chip boom - Reuters"),
+    ("EU AI Act rules for general-purpose AI take effect - Reuters",
+     "EU AI Act obligations for general-purpose AI models kick in - TechCrunch"),
+]
+
+# 同じ企業・分野の別のニュースの組
+DIFFERENT_STORY_PAIRS = [
+    ("OpenAI、新モデル「GPT-5」を発表", "OpenAI、動画生成AI「Sora」を日本で提供開始"),
+    ("ソフトバンクG、AI投資で最終黒字", "ソフトバンクとOpenAI、合弁会社を設立"),
+    ("Google、生成AI「Gemini 2.5」を発表", "Google、AI検索「AIモード」を日本語で提供"),
+    ("政府、AI推進法案を閣議決定", "政府、生成AIの著作権に関する指針を公表"),
+    ("楽天、日本語LLM「Rakuten AI 2.0」を公開", "楽天モバイル、AIアシスタントを導入"),
+    ("NTT、軽量LLM「tsuzumi」の商用提供を開始", "NTTドコモ、生成AIで問い合わせ対応を自動化"),
+    ("生成AIの電力消費が急増、データセンター建設相次ぐ", "生成AIで作成した偽画像、SNSで拡散"),
+    ("NVIDIAの決算、売上高が過去最高", "NVIDIA、次世代GPU「Rubin」を発表"),
+    ("Apple、「Apple Intelligence」の日本語対応を開始", "Apple、AI検索でGoogleと提携を検討"),
+    ("OpenAI launches GPT-5, its most capable model yet", "OpenAI launches Sora app for iOS"),
+    ("Anthropic raises $13 billion at $183 billion valuation", "Anthropic launches Claude for Chrome"),
+    ("Nvidia reports record revenue as AI chip demand soars", "Nvidia invests $5 billion in Intel"),
+    ("Meta hires Apple's top AI models executive", "Meta releases Llama 4 models"),
+    ("Google DeepMind unveils Genie 3 world model", "Google releases Gemini 2.5 Flash Image model"),
+    ("EU AI Act rules for general-purpose AI take effect", "EU fines Google over adtech practices"),
+]
+
+
+def similarities(pairs):
+    return [jaccard(story_shingles({"title": a}), story_shingles({"title": b})) for a, b in pairs]
+
+
+def detected(pairs):
+    """履歴に1件目を登録し、2件目が重複として除外されるかをStoryIndexで確認"""
+    count = 0
+    for a, b in pairs:
+        index = StoryIndex(None)
+        index.add([{"title": a}])
+        with contextlib.redirect_stdout(io.StringIO()):
+            count += not index.filter_new([{"title": b}])
+    return count
+
+
+def measure_load(num_entries):
+    """num_entries件の履歴の読み込み時間（シグネチャの計算を含む）"""
+    now = time.time()
+    entries = [{"ts": now, "title": f"{a} ({i})"} for i in range(num_entries // len(SAME_STORY_PAIRS) + 1)
+               for a, _ in SAME_STORY_PAIRS][:num_entries]
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "story_index.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        start = time.perf_counter()
+        StoryIndex(path)
+        return time.perf_counter() - start
+
+
+def main():
+    print("=" * 50)
+    print("🔍 ニュースの重複判定")
+    print("=" * 50)
+
+    threshold = StoryIndex(None).threshold
+    for label, pairs in (("同じニュース", SAME_STORY_PAIRS), ("別のニュース", DIFFERENT_STORY_PAIRS)):
+        values = sorted(similarities(pairs))
+        print(f"📊 {label} ({len(pairs)}組) のJaccard係数: " + ", ".join(f"{v:.2f}" for v in values))
+        print(f"   しきい値{threshold}以上: {sum(v >= threshold for v in values)}組"
+              f" / StoryIndexで重複と判定: {detected(pairs)}組")
+
+    for num_entries in (600, 5000):
+        print(f"⏱️ 履歴{num_entries}件の読み込み: {measure_load(num_entries) * 1000:.1f} ms")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+ローカル処理のベンチマークスイート（ネットワーク不要）
+
+以下を計測し、結果をJSONに保存します。ベースラインと比較して
+しきい値以上に遅くなったケースがあれば終了コード1で終了します。
+
+- search_ai_news: 記録済みの大きなフィード（100/1k/10k件）の取得・解析・重複除外
+- convert_to_wav / parse_audio_mime_type: 1時間分のPCM
+- AudioPostProcessor.process: 1時間分の会話風の音声（ラウドネス正規化・リミッター・無音の短縮）
+- RSSUpdater.update_rss: 100/1k/10k件のフィードへのエピソード追加
+- indent: 深い木・幅の広い木の整形
+- import: 各エントリーポイントのモジュールの読み込み時間（python -X importtime）
+
+使い方:
+    python benchmarks/run_benchmarks.py                    # 計測してベースラインと比較
+    python benchmarks/run_benchmarks.py --save-baseline    # 計測結果をベースラインとして保存
+    python benchmarks/run_benchmarks.py --quick            # 小さい入力で短時間に計測
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from xml.etree import ElementTree as ET
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from bench_feed_parser import make_sample_feed
+from bench_feed_writer import make_item
+from feed_writer import indent_xml
+
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "results", "baseline.json")
+
+# ベースラインより この倍率以上遅ければ回帰とみなす
+DEFAULT_THRESHOLD = 1.25
+
+# 差がこの秒数未満なら倍率を超えても回帰とみなさない（数msのケースの計測のばらつき対策）
+DEFAULT_MIN_DELTA = 0.005
+
+# 読み込み時間を計測するモジュール（podcast_cli.pyの各サブコマンドが読み込むもの）
+IMPORT_MODULES = ["podcast_cli", "update_rss", "upload_to_spotify", "podcast_generator"]
+
+
+class RecordedFeedAdapter(BaseAdapter):
+    """記録済みのフィードを返すrequestsのトランスポート（ネットワークに接続しない）"""
+
+    def __init__(self, feeds):
+        super().__init__()
+        self.feeds = feeds
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200 if request.url in self.feeds else 404
+        response._content = self.feeds.get(request.url, b"")
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/rss+xml"})
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def measure(func, repeat, setup=None):
+    """setup()の後にfunc()を実行し、最良の実行時間（秒）を返す"""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_search_ai_news(results, sizes):
+    """記録済みのフィードでsearch_ai_newsを計測（取得・解析・重複除外）"""
+    from podcast_generator import NEWS_SOURCES, PodcastGenerator
+
+    generator = PodcastGenerator(use_cache=False)
+    for num_items in sizes:
+        feeds = {url: make_sample_feed(num_items) for url in NEWS_SOURCES}
+        adapter = RecordedFeedAdapter(feeds)
+        generator.news_fetcher.session.mount("https://", adapter)
+        generator.news_fetcher.session.mount("http://", adapter)
+
+        items = generator.search_ai_news()
+        assert items, "フィードからニュースを取得できませんでした"
+        results[f"search_ai_news_{num_items}"] = measure(generator.search_ai_news, 5)
+
+
+def bench_audio(results, seconds):
+    """PCMのWAV変換とMIMEタイプの解析を計測"""
+    from podcast_generator import PodcastGenerator
+
+    generator = PodcastGenerator(use_cache=False)
+    mime_type = "audio/L16;codec=pcm;rate=24000"
+    pcm = bytes(24000 * 2 * seconds)
+
+    wav = generator.convert_to_wav(pcm, mime_type)
+    assert len(wav) == len(pcm) + 44
+    del wav
+    results[f"convert_to_wav_{seconds}s"] = measure(lambda: generator.convert_to_wav(pcm, mime_type), 3)
+
+    def parse_many():
+        for _ in range(10000):
+            generator.parse_audio_mime_type(mime_type)
+
+    results["parse_audio_mime_type_x10000"] = measure(parse_many, 5)
+
+
+def bench_postprocess(results, seconds):
+    """会話風の音声（発話と長い無音の繰り返し）の後処理を計測"""
+    import numpy as np
+
+    from audio_postprocess import AudioPostProcessor
+    from wav_writer import WavWriter
+
+    rate = 24000
+    rng = np.random.default_rng(0)
+    t = np.arange(rate * 4) / rate
+    turn = 0.05 * (np.sin(2 * np.pi * 220 * t) + 0.3 * rng.standard_normal(len(t)))
+    pattern = np.concatenate([turn, np.zeros(rate * 2)])
+    pcm = np.rint(np.resize(pattern, rate * seconds) * 32767).astype("<i2")
+    with WavWriter("postprocess_source.wav", sample_rate=rate) as writer:
+        writer.write(pcm.tobytes())
+    del pcm
+
+    processor = AudioPostProcessor()
+    result = processor.process(shutil.copyfile("postprocess_source.wav", "postprocess.wav"))
+    assert result and result["silence_removed_seconds"] > 0
+    results[f"postprocess_{seconds}s"] = measure(
+        lambda: processor.process("postprocess.wav"),
+        3,
+        setup=lambda: shutil.copyfile("postprocess_source.wav", "postprocess.wav"),
+    )
+
+
+def bench_update_rss(results, sizes):
+    """既存のフィードにエピソードを1件追加するupdate_rssを計測"""
+    from update_rss import RSSUpdater
+
+    with open("podcast_benchmark.wav", "wb") as f:
+        f.write(b"RIFF" + bytes(40) + bytes(48000))
+
+    for num_items in sizes:
+        os.environ["FEED_STATE_DIR"] = f"feed_state_{num_items}"
+        updater = RSSUpdater("example/ai-podcast-generator")
+        updater.rss_file = f"docs/podcast_feed_{num_items}.xml"
+        root = updater.create_base_rss()
+        channel = root.find("channel")
+        for i in range(num_items):
+            channel.append(make_item(i))
+        updater.feed_store.rebuild(root)
+
+        assert updater.update_rss()
+        results[f"update_rss_{num_items}"] = measure(updater.update_rss, 5)
+    os.environ.pop("FEED_STATE_DIR", None)
+
+
+def bench_indent(results, depth, width):
+    """深い木・幅の広い木の整形を計測（整形済みの木は毎回作り直す）"""
+    def deep_tree():
+        root = ET.Element("root")
+        node = root
+        for i in range(depth):
+            node = ET.SubElement(node, "node", {"level": str(i)})
+            node.text = "text"
+        return root
+
+    def wide_tree():
+        root = ET.Element("rss")
+        channel = ET.SubElement(root, "channel")
+        for i in range(width):
+            channel.append(make_item(i))
+        return root
+
+    for name, build in ((f"indent_deep_{depth}", deep_tree), (f"indent_wide_{width}", wide_tree)):
+        trees = []
+        results[name] = measure(
+            lambda: indent_xml(trees[-1]),
+            5,
+            setup=lambda build=build: trees.append(build()),
+        )
+
+
+def import_time(module):
+    """新しいプロセスでmoduleを読み込み、-X importtimeの累計時間（秒）を返す"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1_000_000
+    raise RuntimeError(f"{module}の読み込み時間を取得できませんでした")
+
+
+def bench_imports(results, repeat):
+    """エントリーポイントのモジュールの読み込み時間を計測（最良値）"""
+    for module in IMPORT_MODULES:
+        results[f"import_{module}"] = min(import_time(module) for _ in range(repeat))
+
+
+def run_suite(quick=False):
+    """全ケースを計測し、ケース名 → 秒数の辞書を返す"""
+    sizes = (100, 1000) if quick else (100, 1000, 10000)
+    results = {}
+
+    original_dir = os.getcwd()
+    saved_env = {key: os.environ.get(key) for key in ("GEMINI_API_KEY", "PODCAST_METRICS_DIR")}
+    # ベンチマーク中はAPIキー不要・メトリクスも出力しない
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ["PODCAST_METRICS_DIR"] = ""
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            # 計測対象の処理のログは出力しない
+            with contextlib.redirect_stdout(io.StringIO()):
+                bench_search_ai_news(results, sizes)
+                bench_audio(results, 600 if quick else 3600)
+                bench_postprocess(results, 600 if quick else 3600)
+                bench_update_rss(results, sizes)
+                bench_indent(results, depth=200 if quick else 500, width=sizes[-1])
+                bench_imports(results, 3 if quick else 5)
+        finally:
+            os.chdir(original_dir)
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    return results
+
+
+def compare(results, baseline, threshold, min_delta=DEFAULT_MIN_DELTA):
+    """
+    ベースラインと比較し、回帰したケース名のリストを返す
+
+    倍率がthreshold以上で、かつ差がmin_delta秒以上のケースを回帰とする
+    （倍率だけを超えたケースは➖で表示する）。
+    """
+    regressions = []
+    print(f"{'ケース':<32} {'今回':>10} {'基準':>10} {'比率':>7}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<32} {seconds * 1000:>8.2f}ms {'-':>10} {'-':>7}")
+            continue
+        ratio = seconds / base if base else float("inf")
+        if ratio < threshold:
+            mark = "✅"
+        elif seconds - base < min_delta:
+            mark = "➖"
+        else:
+            mark = "❌"
+            regressions.append(name)
+        print(f"{name:<32} {seconds * 1000:>8.2f}ms {base * 1000:>8.2f}ms {ratio:>6.2f}x {mark}")
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ローカル処理のベンチマークスイート")
+    parser.add_argument("--output", default=DEFAULT_RESULTS, help="結果のJSONファイル")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="ベースラインのJSONファイル")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="回帰とみなす倍率（既定: 1.25）")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA * 1000,
+                        help="回帰とみなす最小の差（ミリ秒、既定: 5）")
+    parser.add_argument("--save-baseline", action="store_true", help="結果をベースラインとして保存")
+    parser.add_argument("--quick", action="store_true", help="小さい入力で計測")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("⏱️ ベンチマークスイート")
+    print("=" * 50)
+
+    results = run_suite(quick=args.quick)
+    record = {
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": {name: round(seconds, 6) for name, seconds in results.items()},
+    }
+    write_json(args.output, record)
+    print(f"💾 結果を保存: {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, record)
+        print(f"💾 ベースラインを保存: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️ ベースラインがありません（--save-baselineで作成できます）")
+        for name, seconds in results.items():
+            print(f"{name:<32} {seconds * 1000:>8.2f}ms")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != args.quick:
+        print("⚠️ ベースラインと計測条件（--quick）が異なります")
+    regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ms / 1000)
+
+    print("=" * 50)
+    if regressions:
+        print(f"❌ {len(regressions)}件のケースが{args.threshold}倍以上"
+              f"（{args.min_delta_ms:g}ms以上）遅くなりました: {', '.join(regressions)}")
+        return 1
+    print("✅ 回帰はありません")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
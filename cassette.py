@@ -0,0 +1,252 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+MODES = ("record", "replay")
+
+
+def _jsonable(value):
+    """リクエストのキー計算用に、genaiの型（pydantic）を含む値をJSONにできる形に変換"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    return value
+
+
+def request_key(*parts):
+    """リクエストの内容から記録を引くためのキーを作成"""
+    payload = json.dumps(_jsonable(list(parts)), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    ニュースフィードとGemini APIの応答を記録・再生するカセット
+
+    record: 実際の通信を行い、応答とそのタイミングをディレクトリに記録する
+      - http.jsonl: フィードの応答（ステータス・ヘッダー・本文・所要時間）
+      - gemini.jsonl: generate_contentの応答と、generate_content_streamの
+        チャンクごとの内容・リクエスト開始からの経過時間
+    replay: 記録した応答を同じコードパスに返す（通信しない）。speedは再生速度の倍率で、
+      1は記録時と同じ速度、2は2倍速、0は待ち時間なし（できるだけ速く）
+
+    同じ内容のリクエストは記録順に返す。内容が一致する記録がない場合
+    （ニュースの選択が変わった場合など）は、同じ種類の未使用の記録を記録順に返す。
+    """
+
+    def __init__(self, directory, mode="replay", speed=1.0):
+        if mode not in MODES:
+            raise ValueError(f"カセットのモードが不正です: {mode}（record / replay）")
+        self.directory = directory
+        self.mode = mode
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._records = {}
+        if mode == "record":
+            os.makedirs(directory, exist_ok=True)
+            # 記録し直す場合は前回の記録を消す
+            for name in ("http.jsonl", "gemini.jsonl"):
+                path = os.path.join(directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+        elif not os.path.isdir(directory):
+            raise FileNotFoundError(f"カセットが見つかりません: {directory}")
+
+    @classmethod
+    def from_env(cls):
+        """
+        環境変数 PODCAST_CASSETTE（ディレクトリ）/ PODCAST_CASSETTE_MODE（既定: replay）/
+        PODCAST_REPLAY_SPEED（既定: 1）から作成。PODCAST_CASSETTEが未設定ならNone
+        """
+        directory = os.environ.get("PODCAST_CASSETTE")
+        if not directory:
+            return None
+        return cls(
+            directory,
+            mode=os.environ.get("PODCAST_CASSETTE_MODE", "replay"),
+            speed=float(os.environ.get("PODCAST_REPLAY_SPEED", "1")),
+        )
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _append(self, name, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(os.path.join(self.directory, name), "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _load(self, name):
+        """記録を読み込み、キーごとのキューと記録順のリストを返す（ロック内で呼ぶ）"""
+        if name not in self._records:
+            ordered = []
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    ordered = [json.loads(line) for line in f if line.strip()]
+            by_key = {}
+            for record in ordered:
+                record["used"] = False
+                by_key.setdefault(record["key"], deque()).append(record)
+            self._records[name] = (by_key, ordered)
+        return self._records[name]
+
+    def take(self, name, key, group):
+        """キーに一致する未使用の記録を取り出す（なければ同じgroupの未使用の記録）"""
+        with self._lock:
+            by_key, ordered = self._load(name)
+            matches = by_key.get(key)
+            while matches and matches[0]["used"]:
+                matches.popleft()
+            if matches:
+                record = matches.popleft()
+            else:
+                record = next(
+                    (r for r in ordered if not r["used"] and r["group"] == group), None
+                )
+                if record is None:
+                    raise LookupError(f"カセットに記録がありません: {group}")
+                print(f"⚠️ カセットに一致する記録がないため、記録順の応答を使用: {group}")
+            record["used"] = True
+            return record
+
+    def wait_until(self, start, offset):
+        """リクエスト開始からoffset秒（再生速度で換算）になるまで待つ"""
+        if self.speed <= 0:
+            return
+        delay = offset / self.speed - (time.perf_counter() - start)
+        if delay > 0:
+            time.sleep(delay)
+
+    def http_adapter(self, adapter=None):
+        """requestsのSessionにマウントするトランスポート（記録時はadapterで実際に通信）"""
+        return CassetteHTTPAdapter(self, adapter)
+
+    def wrap_client(self, client=None):
+        """genai.Clientを記録・再生付きのクライアントで包む（再生時はclient不要）"""
+        return CassetteClient(self, client)
+
+
+class CassetteHTTPAdapter(BaseAdapter):
+    """フィードの応答を記録・再生するrequestsのトランスポート"""
+
+    def __init__(self, cassette, adapter=None):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url)
+        start = time.perf_counter()
+        if self.cassette.replaying:
+            record = self.cassette.take("http.jsonl", key, request.url)
+            self.cassette.wait_until(start, record["elapsed"])
+            response = requests.Response()
+            response.status_code = record["status"]
+            response.headers = CaseInsensitiveDict(record["headers"])
+            response._content = base64.b64decode(record["body"])
+            response.url = request.url
+            response.request = request
+            response.elapsed = timedelta(seconds=record["elapsed"])
+            return response
+
+        response = self.adapter.send(request, **kwargs)
+        # 本文の受信までを所要時間に含める
+        content = response.content
+        self.cassette._append("http.jsonl", {
+            "key": key,
+            "group": request.url,
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "body": base64.b64encode(content).decode("ascii"),
+            "elapsed": round(time.perf_counter() - start, 6),
+        })
+        return response
+
+    def close(self):
+        if self.adapter:
+            self.adapter.close()
+
+
+class CassetteModels:
+    """client.modelsのgenerate_content / generate_content_streamを記録・再生"""
+
+    def __init__(self, cassette, models=None):
+        self.cassette = cassette
+        self.models = models
+
+    def generate_content(self, model, contents, config=None):
+        from google.genai import types
+
+        key = request_key(model, contents, config)
+        start = time.perf_counter()
+        if self.cassette.replaying:
+            record = self.cassette.take("gemini.jsonl", key, model)
+            (chunk,) = record["chunks"]
+            self.cassette.wait_until(start, chunk["offset"])
+            return types.GenerateContentResponse.model_validate_json(chunk["response"])
+
+        response = self.models.generate_content(model=model, contents=contents, config=config)
+        self.cassette._append("gemini.jsonl", {
+            "key": key,
+            "group": model,
+            "method": "generate_content",
+            "chunks": [{
+                "offset": round(time.perf_counter() - start, 6),
+                "response": response.model_dump_json(exclude_none=True),
+            }],
+        })
+        return response
+
+    def generate_content_stream(self, model, contents, config=None):
+        from google.genai import types
+
+        key = request_key(model, contents, config)
+        start = time.perf_counter()
+        if self.cassette.replaying:
+            # チャンクの区切りと到着時刻を記録どおりに再現
+            record = self.cassette.take("gemini.jsonl", key, model)
+            for chunk in record["chunks"]:
+                self.cassette.wait_until(start, chunk["offset"])
+                yield types.GenerateContentResponse.model_validate_json(chunk["response"])
+            return
+
+        # ストリームを最後まで受信できた場合のみ記録する
+        chunks = []
+        for response in self.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        ):
+            chunks.append({
+                "offset": round(time.perf_counter() - start, 6),
+                "response": response.model_dump_json(exclude_none=True),
+            })
+            yield response
+        self.cassette._append("gemini.jsonl", {
+            "key": key,
+            "group": model,
+            "method": "generate_content_stream",
+            "chunks": chunks,
+        })
+
+
+class CassetteClient:
+    """genai.Clientの代わりに使う、modelsだけを持つクライアント"""
+
+    def __init__(self, cassette, client=None):
+        self.models = CassetteModels(cassette, client.models if client else None)
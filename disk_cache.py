@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import time
+
+from atomic_write import write_atomic
+
+
+class DiskCache:
+    """
+    ディスク上のシンプルなキャッシュ
+
+    - キーのSHA-256をファイル名として1エントリ1ファイルで保存
+    - 読み込み時にmtimeを更新し、容量超過時は最も古いものから削除（LRU）
+    - 書き込みは一時ファイル + renameでアトミックに行う
+    - ttl(秒)を指定すると、作成から期限を過ぎたエントリは無効として扱う
+      （get_bytes/set_bytesのバイナリエントリはLRUのみ）
+    - max_bytes=Noneの場合は削除しない（チェックポイントなど消えては困るデータ用）
+    """
+
+    def __init__(self, directory, max_bytes=20 * 1024 * 1024, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key, suffix=".json"):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}{suffix}")
+
+    def get(self, key):
+        """キーに対応する値を返す（なければNone）"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("key") != key:
+            return None
+
+        if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path)  # LRU用にアクセス時刻を更新
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, key, value):
+        """キーに値を保存し、必要なら古いエントリを削除"""
+        data = json.dumps({"key": key, "created": time.time(), "value": value}, ensure_ascii=False)
+        write_atomic(self._path(key), data.encode("utf-8"))
+        self.evict()
+
+    def get_bytes(self, key):
+        """キーに対応するバイナリを返す（なければNone）"""
+        path = self._path(key, ".bin")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        try:
+            os.utime(path)  # LRU用にアクセス時刻を更新
+        except OSError:
+            pass
+        return data
+
+    def set_bytes(self, key, data):
+        """キーにバイナリを保存し、必要なら古いエントリを削除"""
+        write_atomic(self._path(key, ".bin"), data)
+        self.evict()
+
+    def evict(self):
+        """合計サイズが上限を超えていれば古い順に削除"""
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    audio_path TEXT NOT NULL,
+    script_path TEXT,
+    size INTEGER,
+    duration REAL,
+    content_hash TEXT,
+    guid TEXT,
+    rss_published_at TEXT,
+    uploaded_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_episodes_created ON episodes (created_at);
+CREATE INDEX IF NOT EXISTS idx_episodes_rss ON episodes (rss_published_at, created_at);
+CREATE INDEX IF NOT EXISTS idx_episodes_upload ON episodes (uploaded_at, created_at);
+"""
+
+# 公開状態ごとの列（mark_publishedなどで更新する列名の許可リストを兼ねる）
+PUBLISH_COLUMNS = {
+    "rss": "rss_published_at",
+    "upload": "uploaded_at",
+}
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """ファイルのSHA-256をブロック単位で計算"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class EpisodeCatalog:
+    """
+    生成したエピソードを記録するSQLiteのカタログ
+
+    PodcastGenerator.run がエピソードを登録し、RSS更新やアップロードの各ステージは
+    ディレクトリを走査せずに、インデックス経由で「最新」「未公開」のエピソードを取得する。
+    """
+
+    def __init__(self, path="episodes.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def add_episode(self, audio_path, script_path=None, size=None, duration=None, content_hash=None):
+        """エピソードを登録し、IDを返す"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO episodes (created_at, audio_path, script_path, size, duration, content_hash)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(), audio_path, script_path, size, duration, content_hash),
+            )
+        return cursor.lastrowid
+
+    def get(self, episode_id):
+        row = self.conn.execute("SELECT * FROM episodes WHERE id = ?", (episode_id,)).fetchone()
+        return dict(row) if row else None
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM episodes").fetchone()[0]
+
+    def latest(self):
+        """最新のエピソードを返す"""
+        row = self.conn.execute(
+            "SELECT * FROM episodes ORDER BY created_at DESC, id DESC LIMIT 1"
+        ).fetchone()
+        return dict(row) if row else None
+
+    def latest_unpublished(self, target="rss"):
+        """指定した公開先（rss / upload）に未公開の最新エピソードを返す"""
+        column = PUBLISH_COLUMNS[target]
+        row = self.conn.execute(
+            f"SELECT * FROM episodes WHERE {column} IS NULL"
+            " ORDER BY created_at DESC, id DESC LIMIT 1"
+        ).fetchone()
+        return dict(row) if row else None
+
+    def unpublished(self, target="rss"):
+        """指定した公開先（rss / upload）に未公開のエピソードを古い順に返す"""
+        column = PUBLISH_COLUMNS[target]
+        rows = self.conn.execute(
+            f"SELECT * FROM episodes WHERE {column} IS NULL ORDER BY created_at, id"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_published(self, episode_id, target="rss", guid=None):
+        """エピソードを公開済みとして記録"""
+        column = PUBLISH_COLUMNS[target]
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE episodes SET {column} = ?, guid = COALESCE(?, guid) WHERE id = ?",
+                (datetime.now().isoformat(), guid, episode_id),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def open_catalog(path=None):
+    """カタログを開く（省略時は環境変数 PODCAST_CATALOG、既定: episodes.db）"""
+    return EpisodeCatalog(path or os.environ.get("PODCAST_CATALOG", "episodes.db"))
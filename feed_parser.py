@@ -0,0 +1,71 @@
+from io import BytesIO
+
+from lxml import etree
+
+
+# 子要素のローカル名 → ニュース項目のキー（RSS 1.0の公開日時はdc:date）
+FEED_FIELDS = {
+    "title": "title",
+    "description": "description",
+    "link": "link",
+    "pubDate": "pub_date",
+    "date": "pub_date",
+}
+
+# RSS 2.0（名前空間なし）とRSS 1.0/RDF（既定の名前空間）の<item>
+RSS1_NS = "http://purl.org/rss/1.0/"
+ITEM_TAGS = ("item", f"{{{RSS1_NS}}}item")
+
+
+def parse_feed_items(content, limit=3):
+    """
+    RSSフィードから先頭limit件の<item>をストリーミングで抽出
+
+    ツリー全体を構築せず、iterparseで<item>の終了タグごとに
+    title/description/link/pubDateを1パスで取り出す。RSS 1.0/RDFのフィードは
+    要素が名前空間付きのため、子要素はローカル名で照合する。
+    limit件に達した時点でパースを打ち切り、処理済みの要素は解放する。
+    """
+    news_items = []
+    if limit <= 0:
+        return news_items
+
+    context = etree.iterparse(
+        BytesIO(content),
+        events=("end",),
+        tag=ITEM_TAGS,
+        recover=True,
+        resolve_entities=False,
+        no_network=True,
+    )
+
+    try:
+        for _, item in context:
+            news_item = {key: "" for key in FEED_FIELDS.values()}
+            for child in item:
+                # コメントなどの要素以外は読み飛ばす
+                if not isinstance(child.tag, str):
+                    continue
+                key = FEED_FIELDS.get(etree.QName(child).localname)
+                if key and not news_item[key]:
+                    news_item[key] = "".join(child.itertext())
+            if any(news_item.values()):
+                news_items.append(news_item)
+
+            # 処理済みの要素と、それより前の兄弟要素を解放
+            item.clear()
+            parent = item.getparent()
+            if parent is not None:
+                while item.getprevious() is not None:
+                    del parent[0]
+
+            if len(news_items) >= limit:
+                break
+    except etree.XMLSyntaxError as e:
+        # 途中まで取得できた分は返す
+        if not news_items:
+            raise ValueError(f"フィードの解析に失敗しました: {e}") from e
+    finally:
+        del context
+
+    return news_items
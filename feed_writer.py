@@ -0,0 +1,399 @@
+import copy
+import json
+import os
+from xml.etree import ElementTree as ET
+
+from atomic_write import atomic_open, write_atomic
+
+
+FEED_FOOTER = b"  </channel>\n</rss>\n"
+
+# RFC 5005 (Feed Paging and Archiving) で使う名前空間
+ATOM_NS = "http://www.w3.org/2005/Atom"
+FH_NS = "http://purl.org/syndication/history/1.0"
+
+
+def indent_xml(elem, level=0):
+    """XMLを見やすく整形"""
+    i = "\n" + level * "  "
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = i + "  "
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+        for child in elem:
+            indent_xml(child, level + 1)
+        if not child.tail or not child.tail.strip():
+            child.tail = i
+    else:
+        if level and (not elem.tail or not elem.tail.strip()):
+            elem.tail = i
+
+
+def _quoteattr(value):
+    """属性値をエスケープして二重引用符で囲む（読み込みの重いxml.sax.saxutilsの代わり）"""
+    value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    return f'"{value}"'
+
+
+def serialize_item(item):
+    """
+    <item>要素を、channel直下の位置でインデントしたXML断片（bytes）に変換
+
+    名前空間の宣言がitem要素に付かないよう、rss/channelで包んで
+    シリアライズしてからitem部分のみを切り出す。
+    """
+    wrapper = ET.Element("rss")
+    channel = ET.SubElement(wrapper, "channel")
+    item = copy.deepcopy(item)
+    item.tail = None
+    channel.append(item)
+    indent_xml(wrapper)
+
+    text = ET.tostring(wrapper, encoding="unicode")
+    start = text.index("<item")
+    end = text.rindex("</item>") + len("</item>")
+    return ("    " + text[start:end] + "\n").encode("utf-8")
+
+
+def serialize_header(root):
+    """rss要素からitemを除いたチャンネル部分を、XML宣言付きのヘッダー（bytes）に変換"""
+    root = copy.deepcopy(root)
+    channel = root.find("channel")
+    for item in channel.findall("item"):
+        channel.remove(item)
+    indent_xml(root)
+
+    data = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+    end = data.rindex(b"</channel>")
+    return data[:end].rstrip(b" ")
+
+
+class FeedStore:
+    """
+    RSSフィードを差分で更新するためのストア
+
+    state_dir に以下を保持し、エピソード追加時にフィード全体を
+    パース・整形し直さずに済むようにする。
+
+    - header.xml: シリアライズ済みのチャンネル情報（item以外）
+    - items.xml: エピソードごとのシリアライズ済み<item>断片を追記したもの
+    - index.jsonl: 各断片の位置・GUID・公開日時など
+    - state.json: items.xml/index.jsonlの確定済みサイズと件数、期限切れの先頭位置
+
+    フィードは ヘッダー + 断片 + 終了タグ をバイト列のままストリーミングで
+    一時ファイルに書き出し、renameで置き換える。
+
+    max_itemsを指定すると、メインのフィードには最新max_items件のみを載せ、
+    古いエピソードはpage_size件ごとのアーカイブページ（RFC 5005の
+    Archived Feeds）に出力する。アーカイブページはページが埋まった時点で
+    一度だけ書き出し、以降は変更しない。GUIDは断片ごと保持されるため変わらない。
+
+    保持ポリシーによる削除は常に古い順なので、state.jsonの先頭位置（head）を
+    進めるだけで行う。期限切れの断片は書き直さずに読み飛ばし、アーカイブページは
+    全エピソードが期限切れになったページを削除する。残る最も古いページだけは、
+    期限切れのエピソード（削除される音声）と削除したページへのリンクを除いて書き直す。
+    ページ番号は期限切れを含めた通し番号のため、作り直しても変わらない。
+    """
+
+    def __init__(self, state_dir, max_items=0, page_size=0, archive_dir=None,
+                 feed_url="", archive_base_url=""):
+        self.state_dir = state_dir
+        self.max_items = max_items
+        # メインのフィードとアーカイブの間でエピソードが欠けないよう、ページサイズはmax_items以下
+        self.page_size = min(page_size or max_items, max_items) if max_items else 0
+        self.archive_dir = archive_dir
+        self.feed_url = feed_url
+        self.archive_base_url = archive_base_url
+        self.header_path = os.path.join(state_dir, "header.xml")
+        self.items_path = os.path.join(state_dir, "items.xml")
+        self.index_path = os.path.join(state_dir, "index.jsonl")
+        self.state_path = os.path.join(state_dir, "state.json")
+
+    def exists(self):
+        return os.path.exists(self.state_path) and os.path.exists(self.header_path)
+
+    def load_state(self):
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        # headのない旧形式のstate.jsonは期限切れなしとして扱う
+        state.setdefault("head", 0)
+        state.setdefault("head_offset", 0)
+        state.setdefault("head_index", 0)
+        return state
+
+    def _save_state(self, state):
+        write_atomic(self.state_path, json.dumps(state).encode("utf-8"))
+
+    def _index_entry(self, item, offset, length):
+        enclosure = item.find("enclosure")
+        guid = item.find("guid")
+        pub_date = item.find("pubDate")
+        return {
+            "guid": guid.text if guid is not None else None,
+            "pub_date": pub_date.text if pub_date is not None else None,
+            "url": enclosure.get("url") if enclosure is not None else None,
+            "length": int(enclosure.get("length") or 0) if enclosure is not None else 0,
+            "offset": offset,
+            "size": length,
+        }
+
+    def rebuild(self, root):
+        """
+        rss要素全体からストアを作り直す（初回移行・一括修正用）
+
+        rootは期限切れでないエピソードのみ（load_root参照）とし、既存のストアの
+        期限切れの件数（head）を引き継いで、アーカイブのページ番号を変えない。
+        """
+        head = self.load_state()["head"] if self.exists() else 0
+        os.makedirs(self.state_dir, exist_ok=True)
+        write_atomic(self.header_path, serialize_header(root))
+
+        offset = 0
+        index_lines = []
+        with open(self.items_path, "wb") as items_file:
+            for item in root.find("channel").findall("item"):
+                fragment = serialize_item(item)
+                items_file.write(fragment)
+                entry = self._index_entry(item, offset, len(fragment))
+                index_lines.append(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+                offset += len(fragment)
+
+        index_data = b"".join(index_lines)
+        with open(self.index_path, "wb") as index_file:
+            index_file.write(index_data)
+
+        # 期限切れの断片は書き出さないため、ファイルの先頭がhead件目になる
+        self._save_state({
+            "items_end": offset,
+            "index_end": len(index_data),
+            "count": head + len(index_lines),
+            "head": head,
+            "head_offset": 0,
+            "head_index": 0,
+        })
+        self.write_archives(rewrite=True)
+
+    def append_item(self, item):
+        """エピソードを1件追加（既存の断片には触れない）"""
+        state = self.load_state()
+        fragment = serialize_item(item)
+        entry = self._index_entry(item, state["items_end"], len(fragment))
+        index_line = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+
+        # 前回中断した書き込みの残りがあれば切り捨ててから追記
+        with open(self.items_path, "r+b") as f:
+            f.truncate(state["items_end"])
+            f.seek(state["items_end"])
+            f.write(fragment)
+        with open(self.index_path, "r+b") as f:
+            f.truncate(state["index_end"])
+            f.seek(state["index_end"])
+            f.write(index_line)
+
+        # state.jsonの更新を確定点とする
+        self._save_state({
+            **state,
+            "items_end": state["items_end"] + len(fragment),
+            "index_end": state["index_end"] + len(index_line),
+            "count": state["count"] + 1,
+        })
+        self.write_archives()
+        return entry
+
+    def read_entries(self):
+        """期限切れでない全エピソードのインデックスを読み込む"""
+        state = self.load_state()
+        with open(self.index_path, "rb") as f:
+            f.seek(state["head_index"])
+            data = f.read(state["index_end"] - state["head_index"])
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    def tail_entries(self, count):
+        """末尾からcount件のインデックスを、インデックス全体を読まずに取得"""
+        state = self.load_state()
+        count = min(count, state["count"] - state["head"])
+        if count <= 0:
+            return []
+
+        end = state["index_end"]
+        data = b""
+        with open(self.index_path, "rb") as f:
+            position = end
+            # 改行がcount+1個含まれるまで後ろから読み進める
+            while position > 0 and data.count(b"\n") <= count:
+                step = min(64 * 1024, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = [line for line in data[:end - position].splitlines() if line]
+        return [json.loads(line) for line in lines[-count:]]
+
+    def expire_head(self, count):
+        """
+        古い順にcount件のエピソードを期限切れにする
+
+        items.xml/index.jsonlは書き直さず、state.jsonの先頭位置を進めるだけにする。
+        全エピソードが期限切れになったアーカイブページを削除し、残る最も古いページを
+        期限切れのエピソードと前のページへのリンクを除いて書き直す。
+        """
+        state = self.load_state()
+        count = min(count, state["count"] - state["head"])
+        if count <= 0:
+            return
+
+        head_index = state["head_index"]
+        with open(self.index_path, "rb") as f:
+            f.seek(head_index)
+            for _ in range(count):
+                head_index += len(f.readline())
+            line = f.readline() if head_index < state["index_end"] else b""
+        head_offset = json.loads(line)["offset"] if line.strip() else state["items_end"]
+
+        old_head = state["head"]
+        self._save_state({
+            **state,
+            "head": old_head + count,
+            "head_offset": head_offset,
+            "head_index": head_index,
+        })
+
+        if self.page_size and self.archive_dir:
+            head = old_head + count
+            for page in range(old_head // self.page_size + 1, head // self.page_size + 1):
+                if os.path.exists(self.archive_path(page)):
+                    os.remove(self.archive_path(page))
+                    print(f"🗄️ 期限切れのアーカイブページを削除: {self.archive_path(page)}")
+            oldest = head // self.page_size + 1
+            if os.path.exists(self.archive_path(oldest)):
+                self._write_page(oldest, self.load_state())
+
+    def archive_path(self, page):
+        return os.path.join(self.archive_dir, f"feed_{page}.xml")
+
+    def archive_url(self, page):
+        return f"{self.archive_base_url}feed_{page}.xml"
+
+    def _link(self, rel, href):
+        return f"    <atom:link rel={_quoteattr(rel)} href={_quoteattr(href)} />\n".encode("utf-8")
+
+    def _write_document(self, path, start, end, extra=b""):
+        """ヘッダー + extra + 断片[start:end] + 終了タグ をアトミックに書き出す"""
+        with open(self.header_path, "rb") as f:
+            header = f.read()
+        if extra:
+            # アーカイブ用のリンクに必要な名前空間をルート要素に宣言
+            header = header.replace(
+                b"<rss ",
+                f"<rss xmlns:atom=\"{ATOM_NS}\" xmlns:fh=\"{FH_NS}\" ".encode("utf-8"),
+                1,
+            )
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with atomic_open(path, permissions=0o644) as out:
+            out.write(header)
+            out.write(extra)
+            with open(self.items_path, "rb") as f:
+                f.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    block = f.read(min(1024 * 1024, remaining))
+                    if not block:
+                        break
+                    out.write(block)
+                    remaining -= len(block)
+            out.write(FEED_FOOTER)
+
+    def write_archives(self, rewrite=False):
+        """
+        埋まったアーカイブページを書き出す
+
+        通常は最新の埋まったページが未作成の場合のみ書き出す。
+        rewrite=Trueの場合は既存のページを削除して全ページを作り直す。
+        ページ番号は期限切れを含めた通し番号で、期限切れのエピソードは載せない。
+        """
+        if not self.page_size or not self.archive_dir:
+            return
+
+        state = self.load_state()
+        head = state["head"]
+        full_pages = state["count"] // self.page_size
+
+        if rewrite:
+            if os.path.isdir(self.archive_dir):
+                for name in os.listdir(self.archive_dir):
+                    if name.startswith("feed_") and name.endswith(".xml"):
+                        os.remove(os.path.join(self.archive_dir, name))
+            entries = self.read_entries()
+            pages = range(head // self.page_size + 1, full_pages + 1)
+        else:
+            if full_pages * self.page_size <= head or os.path.exists(self.archive_path(full_pages)):
+                return
+            entries = None
+            pages = [full_pages]
+
+        for page in pages:
+            self._write_page(page, state, entries)
+
+    def _write_page(self, page, state, entries=None):
+        """
+        アーカイブページを1つ書き出す
+
+        ページの先頭が期限切れの場合は残りのエピソードだけを載せ、前のページへのリンクは
+        そのページに期限切れでないエピソードがある場合のみ付ける。
+        entries（read_entriesの結果）を省略した場合は末尾からインデックスを読む。
+        """
+        head = state["head"]
+        first = max((page - 1) * self.page_size, head)
+        if entries is None:
+            page_entries = self.tail_entries(state["count"] - first)[:page * self.page_size - first]
+        else:
+            page_entries = entries[first - head:page * self.page_size - head]
+
+        links = b"    <fh:archive />\n"
+        links += self._link("self", self.archive_url(page))
+        links += self._link("current", self.feed_url)
+        if (page - 1) * self.page_size > head:
+            links += self._link("prev-archive", self.archive_url(page - 1))
+
+        start = page_entries[0]["offset"]
+        end = page_entries[-1]["offset"] + page_entries[-1]["size"]
+        self._write_document(self.archive_path(page), start, end, links)
+        print(f"🗄️ アーカイブページを作成: {self.archive_path(page)}")
+
+    def write_feed(self, rss_file):
+        """
+        メインのフィードを書き出し、掲載したエピソード数を返す
+
+        ヘッダー + 断片 + 終了タグをストリーミングで書き出し、アトミックに置き換える。
+        max_items指定時は最新max_items件のみを載せ、アーカイブへのリンクを付ける。
+        """
+        state = self.load_state()
+        start = state["head_offset"]
+        count = state["count"] - state["head"]
+        extra = b""
+
+        if self.max_items and count > self.max_items:
+            entries = self.tail_entries(self.max_items)
+            start = entries[0]["offset"]
+            count = len(entries)
+
+        if self.max_items and self.archive_dir:
+            full_pages = state["count"] // self.page_size
+            extra = self._link("self", self.feed_url)
+            if full_pages * self.page_size > state["head"]:
+                extra += self._link("prev-archive", self.archive_url(full_pages))
+
+        self._write_document(rss_file, start, state["items_end"], extra)
+        return count
+
+    def load_root(self):
+        """期限切れでない全エピソードを含むrss要素を組み立てる（一括修正用）"""
+        state = self.load_state()
+        with open(self.header_path, "rb") as f:
+            data = f.read()
+        with open(self.items_path, "rb") as f:
+            f.seek(state["head_offset"])
+            data += f.read(state["items_end"] - state["head_offset"])
+        return ET.fromstring(data + FEED_FOOTER)
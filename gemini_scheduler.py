@@ -0,0 +1,252 @@
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+
+import httpx
+from google.genai import errors
+
+
+# 優先度（小さいほど先に送信）
+# キューはモデルごとなので、同じモデルへのリクエストの間でのみ順序が変わる
+# （台本と音声合成はモデルもレート制限も別のため、互いに待たせることはない）
+PRIORITY_TTS = 0
+PRIORITY_SCRIPT = 1
+
+# モデルごとの既定の上限（rpm: 1分あたりのリクエスト数、tpm: 1分あたりのトークン数、0は無制限）
+# GEMINI_RATE_LIMITS="モデル名=rpm:tpm;..." で上書きできる
+DEFAULT_LIMITS = {"rpm": 10, "tpm": 1_000_000}
+MODEL_LIMITS = {
+    "gemini-2.0-flash-exp": {"rpm": 10, "tpm": 4_000_000},
+    "gemini-2.5-flash-preview-tts": {"rpm": 10, "tpm": 0},
+}
+
+# 再試行する HTTP ステータス（レート制限と一時的なサーバーエラー）
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+RETRY_DELAY_RE = re.compile(r"""["']?retryDelay["']?\s*:\s*["']?(\d+(?:\.\d+)?)s""")
+
+
+def parse_rate_limits(text):
+    """GEMINI_RATE_LIMITS（"モデル名=rpm:tpm;..."）を解析"""
+    limits = {}
+    for entry in (text or "").split(";"):
+        if "=" not in entry:
+            continue
+        model, values = entry.split("=", 1)
+        rpm, _, tpm = values.partition(":")
+        limits[model.strip()] = {"rpm": int(rpm or 0), "tpm": int(tpm or 0)}
+    return limits
+
+
+def estimate_tokens(text):
+    """送信するテキストのトークン数の概算（日本語は1文字あたり1トークン弱）"""
+    return max(1, len(text))
+
+
+def retry_after(error):
+    """
+    エラーから再試行までの待ち時間（秒）のヒントを取得
+
+    429のレスポンス本文のRetryInfo（retryDelay）とRetry-Afterヘッダーを参照する。
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    match = RETRY_DELAY_RE.search(str(getattr(error, "details", "") or error))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def is_retryable(error):
+    """再試行すべきエラーか（レート制限・一時的なサーバーエラー・通信エラー）"""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_CODES
+    return isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError))
+
+
+class TokenBucket:
+    """1分あたりの上限を一定の速度で補充するトークンバケット（0は無制限）"""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.per_minute:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """amountを消費できるまでの待ち時間（上限を超える量は満杯になれば許可）"""
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60 / self.per_minute
+
+    def consume(self, amount, now):
+        if self.per_minute:
+            self._refill(now)
+            self.tokens -= amount
+
+
+class ModelQueue:
+    """モデルごとの送信待ちの優先度付きキューとレート制限の状態"""
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.heap = []
+        self.paused_until = 0.0
+
+
+class GeminiScheduler:
+    """
+    Gemini APIの呼び出しを集約するスケジューラー
+
+    - モデルごとにリクエスト数・トークン数のトークンバケットで送信を制限
+    - 送信待ちはモデルごとに優先度（同じ優先度なら到着順）のキューで管理し、
+      先頭のリクエストだけが送信の機会を待つ（一斉送信を防ぐ）
+    - 429や一時的な5xxはジッター付きの指数バックオフで再試行し、
+      サーバーの待ち時間のヒント（retryDelay/Retry-After）があれば従う
+    - 429を受けたモデルはヒントの時間だけ全リクエストの送信を止める
+
+    shareを指定すると、同じAPIキーを使う複数のプロセスで上限を分け合うよう
+    各モデルの上限をshare分の1にする（run_showsのワーカーごとに作成する場合）。
+    """
+
+    def __init__(self, limits=None, max_retries=5, base_delay=1.0, max_delay=60.0, share=1):
+        self.limits = dict(MODEL_LIMITS)
+        self.limits.update(limits or {})
+        self.default_limits = DEFAULT_LIMITS
+        self.share = max(1, share)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queues = {}
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_env(cls, share=1):
+        """環境変数 GEMINI_RATE_LIMITS / GEMINI_MAX_RETRIES から作成"""
+        return cls(
+            limits=parse_rate_limits(os.environ.get("GEMINI_RATE_LIMITS")),
+            max_retries=int(os.environ.get("GEMINI_MAX_RETRIES", "5")),
+            share=share,
+        )
+
+    @classmethod
+    def unlimited(cls):
+        """レート制限をかけないスケジューラー（記録済みの応答の再生用）"""
+        scheduler = cls()
+        scheduler.limits = {}
+        scheduler.default_limits = {"rpm": 0, "tpm": 0}
+        return scheduler
+
+    def _queue(self, model):
+        queue = self._queues.get(model)
+        if queue is None:
+            limits = self.limits.get(model, self.default_limits)
+            queue = ModelQueue(limits.get("rpm", 0) / self.share, limits.get("tpm", 0) / self.share)
+            self._queues[model] = queue
+        return queue
+
+    def _acquire(self, model, priority, tokens):
+        """キューの先頭になり、レート制限の範囲内で送信できるまで待つ"""
+        with self._condition:
+            queue = self._queue(model)
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(queue.heap, ticket)
+            try:
+                while True:
+                    if queue.heap[0] == ticket:
+                        now = time.monotonic()
+                        wait = max(
+                            queue.paused_until - now,
+                            queue.requests.wait_time(1, now),
+                            queue.tokens.wait_time(tokens, now),
+                        )
+                        if wait <= 0:
+                            queue.requests.consume(1, now)
+                            queue.tokens.consume(tokens, now)
+                            return
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+            finally:
+                self._remove(queue, ticket)
+                self._condition.notify_all()
+
+    def _remove(self, queue, ticket):
+        if queue.heap and queue.heap[0] == ticket:
+            heapq.heappop(queue.heap)
+        elif ticket in queue.heap:
+            queue.heap.remove(ticket)
+            heapq.heapify(queue.heap)
+
+    def _pause(self, model, seconds):
+        """レート制限を受けたモデルの送信を一時停止"""
+        with self._condition:
+            queue = self._queue(model)
+            queue.paused_until = max(queue.paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+    def _record_usage(self, model, estimated, result):
+        """実際の使用トークン数との差をバケットに反映"""
+        usage = getattr(result, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", None) if usage else None
+        if not actual:
+            return
+        with self._condition:
+            self._queue(model).tokens.consume(actual - estimated, time.monotonic())
+
+    def backoff_delay(self, attempt, hint=None):
+        """attempt回目の再試行までの待ち時間（フルジッター、ヒントがあればその時間以上）"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if hint is not None:
+            # 同じヒントを受けたリクエストが同時に再送しないよう少しずらす
+            delay = hint + random.uniform(0, max(1.0, hint * 0.1))
+        return delay
+
+    def call(self, model, fn, priority=PRIORITY_SCRIPT, estimated_tokens=1):
+        """
+        レート制限の範囲でfn()を実行し、その結果を返す
+
+        fnはAPIを1回呼び出す関数（ストリーミングの場合は受信し終えるまでを含む）。
+        再試行できないエラーや再試行回数を超えた場合は例外をそのまま送出する。
+        """
+        attempt = 0
+        while True:
+            self._acquire(model, priority, estimated_tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                hint = retry_after(e)
+                delay = self.backoff_delay(attempt, hint)
+                if getattr(e, "code", None) == 429:
+                    self._pause(model, delay)
+                print(f"⏳ {model}: {getattr(e, 'code', type(e).__name__)} のため"
+                      f"{delay:.1f}秒後に再試行 ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._record_usage(model, estimated_tokens, result)
+            return result
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+
+from atomic_write import atomic_open
+
+
+TAG_RE = re.compile(r"<[^>]+>")
+SOURCE_SUFFIX_RE = re.compile(r"\s+[-|｜]\s+[^-|｜]{1,40}$")
+SPACE_RE = re.compile(r"\s+")
+WORD_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+
+def normalize_text(text):
+    """比較用にテキストを正規化（HTMLタグ・媒体名・空白を除去し小文字化）"""
+    text = TAG_RE.sub(" ", text or "")
+    text = SPACE_RE.sub(" ", text).strip()
+    return text.lower()
+
+
+def shingles(text, size=2):
+    """比較用の文字n-gramの集合（記号・空白は除く。日本語でも分かち書きなしで比較できる）"""
+    text = WORD_SEPARATOR_RE.sub("", text)
+    if len(text) < size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def story_shingles(item):
+    """ニュース項目のタイトルの文字bigramの集合"""
+    # 説明文は媒体ごとに書き方が大きく異なり一致度を下げるため、タイトルだけで比較する
+    # Google Newsのタイトル末尾の「 - 媒体名」は媒体間で異なるため除去
+    title = SOURCE_SUFFIX_RE.sub("", (item.get("title") or "").strip())
+    return shingles(normalize_text(title))
+
+
+def jaccard(a, b):
+    """2つの集合のJaccard係数"""
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def minhash(shingle_set, num_hashes):
+    """MinHashのシグネチャ（shingleごとに1回のハッシュからnum_hashes個の32bit値を取り出す）"""
+    unpack = struct.Struct(f"<{num_hashes}I").unpack
+    hashes = (
+        unpack(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4 * num_hashes).digest())
+        for shingle in shingle_set
+    )
+    return [min(column) for column in zip(*hashes)]
+
+
+def news_path(script_path):
+    """台本ファイルに対応する、エピソードで扱ったニュースの一覧（JSON）のパス"""
+    return os.path.splitext(script_path)[0] + ".news.json"
+
+
+class StoryIndex:
+    """
+    過去に扱ったニュースのMinHash-LSHインデックス
+
+    タイトルの文字bigramの集合のMinHashを1行ずつのバンドとしてバケットに登録し、
+    いずれかのバンドが一致した候補だけをJaccard係数で確認する。
+    Jaccard係数がs以上の組は確率1-(1-s)^BANDS以上で候補になる（s=0.3で約99%）ため、
+    履歴の件数に関わらずほぼ定数時間で近似重複を検出できる。
+    しきい値は媒体の異なる同じニュースの組と、同じ分野の別のニュースの組で
+    調整している（benchmarks/bench_news_dedup.py）。
+    シグネチャは保存せず、読み込み時に履歴のタイトルから計算する。
+    pathがNoneの場合は保存しないメモリ上のインデックスとして使う。
+    """
+
+    BANDS = 12
+
+    def __init__(self, path=None, threshold=0.3, retention_days=30, max_entries=5000):
+        self.path = path
+        self.threshold = threshold
+        self.retention_days = retention_days
+        self.max_entries = max_entries
+        self.entries = []
+        self.buckets = {}
+        self.load()
+
+    def _bands(self, shingle_set):
+        if not shingle_set:
+            return []
+        return enumerate(minhash(shingle_set, self.BANDS))
+
+    def _register(self, entry, shingle_set=None):
+        self.entries.append(entry)
+        if shingle_set is None:
+            shingle_set = story_shingles(entry)
+        for key in self._bands(shingle_set):
+            self.buckets.setdefault(key, []).append(shingle_set)
+
+    def _reset(self, entries):
+        self.entries = []
+        self.buckets = {}
+        for entry in entries:
+            self._register(entry)
+
+    def _live(self, entries, now=None):
+        """保持期間内で、新しいほうからmax_entries件までの履歴"""
+        cutoff = (now or time.time()) - self.retention_days * 86400
+        return [entry for entry in entries[-self.max_entries:] if entry.get("ts", 0) >= cutoff]
+
+    def load(self):
+        """インデックスを（読み込み済みの内容を破棄して）読み込み、保持期間を過ぎたものを除外"""
+        self._reset([])
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ ニュース履歴の読み込みエラー: {e}")
+            return
+
+        self._reset(self._live(entries))
+
+    def prune(self, now=None):
+        """保持期間を過ぎたものと、max_entriesを超えた古いものを除外"""
+        entries = self._live(self.entries, now)
+        if len(entries) != len(self.entries):
+            self._reset(entries)
+
+    def save(self):
+        """保持期間を過ぎたものを除外して、インデックスをアトミックに保存"""
+        if not self.path:
+            return
+        self.prune()
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with atomic_open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+
+    def contains(self, shingle_set):
+        """Jaccard係数がthreshold以上のニュースが登録済みか判定"""
+        for key in self._bands(shingle_set):
+            for candidate in self.buckets.get(key, ()):
+                if jaccard(candidate, shingle_set) >= self.threshold:
+                    return True
+        return False
+
+    def filter_new(self, news_items):
+        """過去の放送分と、同じ取得結果内の近似重複を除外"""
+        seen = StoryIndex(None, threshold=self.threshold)
+
+        unique_items = []
+        for item in news_items:
+            shingle_set = story_shingles(item)
+            if self.contains(shingle_set) or seen.contains(shingle_set):
+                print(f"♻️ 重複ニュースを除外: {item.get('title', '')[:40]}")
+                continue
+            seen._register({}, shingle_set)
+            unique_items.append(item)
+        return unique_items
+
+    def add(self, news_items):
+        """放送したニュースを履歴に登録"""
+        now = time.time()
+        for item in news_items:
+            self._register({"ts": now, "title": item.get("title", "")[:100]}, story_shingles(item))
+        # 常駐して実行を繰り返す場合も、保持期間を過ぎた履歴で重複と判定しない
+        self.prune(now)
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class NewsFetcher:
+    """
+    複数のニュースソースを並列に取得するフェッチエンジン
+
+    - 1つのSessionを共有し、keep-aliveでコネクションを再利用
+    - ホストごとの同時リクエスト数を制限
+    - 取得ステージ全体にデッドラインを設定
+    - 結果はソースの指定順で返す
+    - cacheを渡すとETag/Last-Modifiedによる条件付きGETを行い、
+      304の場合は前回のパース結果を再利用
+    - 取得したバイト数・304の件数をbytes_fetched/not_modifiedに累計
+    """
+
+    def __init__(self, max_workers=16, per_host_limit=4, timeout=10, deadline=20, cache=None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.deadline = deadline
+        self.cache = cache
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "ai-podcast-generator/1.0"
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_semaphores = {}
+        self._lock = threading.Lock()
+        self.bytes_fetched = 0
+        self.not_modified = 0
+
+    def _host_semaphore(self, url):
+        """ホストごとのセマフォを取得（なければ作成）"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_semaphores[host]
+
+    def fetch(self, url, parse, deadline_at):
+        """1つのソースを取得してパースする"""
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("取得デッドラインを超過しました")
+
+        cached = self.cache.get(url) if self.cache else None
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with self._host_semaphore(url):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("取得デッドラインを超過しました")
+            response = self.session.get(url, headers=headers, timeout=min(self.timeout, remaining))
+
+        with self._lock:
+            self.bytes_fetched += len(response.content)
+            if response.status_code == 304:
+                self.not_modified += 1
+
+        if response.status_code == 304 and cached:
+            return cached["items"]
+
+        if response.status_code != 200:
+            raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+
+        items = parse(response.content)
+
+        if self.cache and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            self.cache.set(url, {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "items": items,
+            })
+        return items
+
+    def fetch_all(self, urls, parse):
+        """
+        全ソースを並列に取得し、ソース順に結果のリストを返す
+
+        parse: レスポンス本文(bytes)を受け取り、パース結果を返す関数
+        取得に失敗したソースやデッドラインに間に合わなかったソースの結果はNone
+        """
+        results = [None] * len(urls)
+        if not urls:
+            return results
+
+        deadline_at = time.monotonic() + self.deadline
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)))
+        try:
+            futures = {
+                executor.submit(self.fetch, url, parse, deadline_at): index
+                for index, url in enumerate(urls)
+            }
+            done, not_done = wait(futures, timeout=max(0, deadline_at - time.monotonic()))
+
+            for future in done:
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"ニュース取得エラー ({urls[index]}): {e}")
+
+            for future in not_done:
+                future.cancel()
+                print(f"ニュース取得タイムアウト ({urls[futures[future]]})")
+        finally:
+            # デッドライン超過したリクエストの完了は待たない
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    def close(self):
+        self.session.close()
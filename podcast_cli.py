@@ -0,0 +1,82 @@
+"""
+ポッドキャストの統合CLI
+
+    python podcast_cli.py generate [--resume] [--no-cache] ...   # 台本・音声の生成
+    python podcast_cli.py publish-feed [--prune] ...              # RSSフィードの更新
+    python podcast_cli.py upload                                  # 未アップロードのエピソードをアップロード
+    python podcast_cli.py all [--resume] [--no-cache] ...         # 生成 → フィード更新 → アップロード
+    python podcast_cli.py daemon [--config shows.toml] [--publish] # 常駐してスケジュールどおりに生成
+
+各サブコマンドは必要なモジュールだけを実行時に読み込む。フィード更新・アップロードだけの
+起動ではgoogle.genaiなどの重いモジュールを読み込まない。allは全ステージを1つのプロセスで
+続けて実行する（サブコマンドの後ろの引数は生成ステージに渡す。フィードを更新できなかった
+場合はアップロードしない）。
+"""
+
+import argparse
+import sys
+import time
+
+
+def generate(argv):
+    from podcast_generator import main
+
+    return main(argv)
+
+
+def publish_feed(argv):
+    from update_rss import main
+
+    return main(argv)
+
+
+def upload(argv):
+    from upload_to_spotify import main
+
+    return main(argv)
+
+
+def daemon(argv):
+    from podcast_daemon import main
+
+    return main(argv)
+
+
+def run_all(argv):
+    """生成・フィード更新・アップロードを1つのプロセスで続けて実行"""
+    start = time.perf_counter()
+    generate(argv)
+    # 生成しなかった場合も、未公開のエピソードがあればフィード更新・アップロードを行う
+    # （アップロードはフィードを更新できた場合のみ）
+    if publish_feed([]):
+        upload([])
+    else:
+        print("⚠️ フィードを更新できなかったため、アップロードをスキップします")
+    print(f"⏱️ 全ステージ完了 ({time.perf_counter() - start:.1f}秒)")
+
+
+COMMANDS = {
+    "generate": generate,
+    "publish-feed": publish_feed,
+    "upload": upload,
+    "all": run_all,
+    "daemon": daemon,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="AIニュースポッドキャストの統合CLI",
+        epilog="各サブコマンドのオプションは `<サブコマンド> --help` で確認できます",
+    )
+    parser.add_argument("command", choices=COMMANDS, help="実行するサブコマンド")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="サブコマンドに渡す引数")
+    args = parser.parse_args(argv)
+
+    # 各スクリプトを直接実行した場合と同じく、例外で終了した場合のみ失敗とする
+    COMMANDS[args.command](args.args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
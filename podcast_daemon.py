@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from show_config import load_shows, resolve_show
+
+
+# PODCAST_SCHEDULE未設定時の生成スケジュール（毎日9:00）
+DEFAULT_SCHEDULE = "0 9 * * *"
+
+# cronの各フィールドの範囲（分・時・日・月・曜日）
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_cron_field(text, low, high):
+    """cronの1フィールド（*、数値、範囲a-b、リストa,b、間隔*/n）を値の集合に変換"""
+    values = set()
+    for part in text.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"cronのフィールドが範囲外です: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """
+    cron形式（分 時 日 月 曜日）のスケジュール（ローカル時刻）
+
+    曜日は0が日曜日（7も日曜日として扱う）。日と曜日の両方を指定した場合は
+    cronと同じくどちらかに一致すれば実行する。
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cronの形式は「分 時 日 月 曜日」です: {expression}")
+        self.expression = expression
+        fields[4] = ",".join("0" if value == "7" else value for value in fields[4].split(","))
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_cron_field(text, low, high) for text, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt):
+        day = dt.day in self.days
+        # PythonのweekdayはMon=0、cronはSun=0
+        weekday = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, dt):
+        """dtより後で最初に一致する時刻を返す"""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 存在しない日付（2月30日など）だけのスケジュールで無限に探さないよう上限を設ける
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+            elif dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"一致する時刻がありません: {self.expression}")
+
+
+class ScheduledShow:
+    """デーモンが生成する1番組の状態（生成器は実行をまたいで使い回す）"""
+
+    def __init__(self, show, schedule):
+        self.show = show
+        self.name = show["name"] or "default"
+        self.schedule = schedule
+        self.next_run = None
+        self.generator = None
+        self.running = False
+        self.runs = 0
+        self.last_run = None
+
+
+class PodcastDaemon:
+    """
+    常駐して番組をスケジュールどおりに生成するデーモン
+
+    - 番組ごとのPodcastGenerator（Geminiのクライアント・HTTPのコネクションプール・
+      放送履歴）を起動時に作成し、全ての実行で使い回す
+    - cron形式のスケジュールで生成し、publish=Trueなら続けてRSSフィードを更新して、
+      更新できた場合は未アップロードのエピソードをアップロードする（podcast_cli.py allと同じ）
+    - 実行は1つずつ順に行い、実行中に過ぎた時刻の分はまとめて1回だけ実行する
+    - ローカルのHTTPエンドポイントで状態を返す（/health: 死活、/status: 番組ごとの状態）
+    """
+
+    def __init__(self, shows, schedule=DEFAULT_SCHEDULE, publish=False, github_repo=None,
+                 use_cache=None, resume=False, host="127.0.0.1", port=8765):
+        self.jobs = [
+            ScheduledShow(show, CronSchedule(show["schedule"] or schedule)) for show in shows
+        ]
+        self.publish = publish
+        self.github_repo = github_repo
+        self.use_cache = use_cache
+        self.resume = resume
+        self.host = host
+        self.port = port
+        self.started_at = datetime.now()
+        self.server = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def warm_up(self):
+        """全番組の生成器を作成（クライアントの初期化を実行時に行わない）"""
+        from podcast_generator import PodcastGenerator
+
+        start = time.perf_counter()
+        for job in self.jobs:
+            job.generator = PodcastGenerator(use_cache=self.use_cache, show=job.show)
+        print(f"🔥 {len(self.jobs)}番組の生成器を準備 ({time.perf_counter() - start:.1f}秒)")
+
+    def run_job(self, job):
+        """1番組を生成し、publish=Trueならフィードを更新してアップロード"""
+        from update_rss import RSSUpdater
+        from upload_to_spotify import SpotifyPodcastUploader
+
+        with self._lock:
+            job.running = True
+        record = {"started_at": datetime.now().isoformat(), "status": "failed"}
+        start = time.perf_counter()
+        try:
+            job.generator.reset_metrics()
+            audio_filename = job.generator.run(resume=self.resume)
+            record["audio_filename"] = audio_filename
+            record["status"] = "success" if audio_filename else "no_news"
+            if audio_filename and self.publish:
+                updater = RSSUpdater(self.github_repo, show=job.show)
+                published = False
+                try:
+                    published = updater.update_rss()
+                finally:
+                    updater.metrics.finish("success" if published else "failed")
+                record["published"] = published
+                # フィードの更新に失敗した場合は公開順を保つためアップロードも次回に回す
+                if published:
+                    record["upload"] = SpotifyPodcastUploader(show=job.show).run()
+        except Exception as e:
+            traceback.print_exc()
+            record["error"] = str(e)
+            print(f"❌ {job.name}: 生成に失敗しました: {e}")
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 3)
+            with self._lock:
+                job.running = False
+                job.runs += 1
+                job.last_run = record
+
+    def status(self):
+        """番組ごとのスケジュールと直近の実行結果"""
+        with self._lock:
+            return {
+                "status": "ok",
+                "started_at": self.started_at.isoformat(),
+                "uptime_seconds": round((datetime.now() - self.started_at).total_seconds(), 1),
+                "shows": [
+                    {
+                        "name": job.name,
+                        "schedule": job.schedule.expression,
+                        "next_run": job.next_run.isoformat() if job.next_run else None,
+                        "running": job.running,
+                        "runs": job.runs,
+                        "last_run": job.last_run,
+                    }
+                    for job in self.jobs
+                ],
+            }
+
+    def start_server(self):
+        """状態を返すHTTPサーバーを別スレッドで起動"""
+        self.server = ThreadingHTTPServer((self.host, self.port), StatusHandler)
+        self.server.podcast_daemon = self
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        host, port = self.server.server_address[:2]
+        print(f"🩺 状態エンドポイント: http://{host}:{port}/status")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        """スケジュールに従って生成を続ける（stop()まで戻らない）"""
+        self.warm_up()
+        if self.port is not None:
+            self.start_server()
+
+        now = datetime.now()
+        for job in self.jobs:
+            job.next_run = job.schedule.next_after(now)
+            print(f"⏰ {job.name}: {job.schedule.expression} (次回 {job.next_run:%Y-%m-%d %H:%M})")
+
+        try:
+            while not self._stop.is_set():
+                job = min(self.jobs, key=lambda job: job.next_run)
+                wait = (job.next_run - datetime.now()).total_seconds()
+                if wait > 0:
+                    # 時刻の変更（スリープ復帰など）に追従するため長くても1分ごとに見直す
+                    self._stop.wait(min(wait, 60))
+                    continue
+                print(f"▶️ {job.name}: スケジュール実行 ({job.next_run:%Y-%m-%d %H:%M})")
+                self.run_job(job)
+                # 実行中に過ぎた時刻の分は実行しない
+                job.next_run = job.schedule.next_after(datetime.now())
+                print(f"⏰ {job.name}: 次回 {job.next_run:%Y-%m-%d %H:%M}")
+        finally:
+            if self.server:
+                self.server.shutdown()
+                self.server.server_close()
+            for job in self.jobs:
+                if job.generator:
+                    job.generator.news_fetcher.close()
+        print("👋 デーモンを停止しました")
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """/health と /status を返すハンドラー"""
+
+    def do_GET(self):
+        if self.path == "/health":
+            body = {"status": "ok"}
+        elif self.path == "/status":
+            body = self.server.podcast_daemon.status()
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # アクセスログは出力しない（ヘルスチェックで埋まるため）
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="常駐してスケジュールどおりにポッドキャストを生成")
+    parser.add_argument("--config", help="番組設定ファイル（TOML、省略時は既定の番組のみ）")
+    parser.add_argument("--show", action="append", help="生成する番組名（複数指定可）")
+    parser.add_argument("--schedule", default=os.environ.get("PODCAST_SCHEDULE", DEFAULT_SCHEDULE),
+                        help="番組にscheduleがない場合のスケジュール（cron形式、ローカル時刻）")
+    parser.add_argument("--publish", action="store_true", help="生成後にRSSフィードを更新してアップロード")
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを使わずに台本・音声を生成")
+    parser.add_argument("--resume", action="store_true",
+                        help="未完了の実行があれば完了済みのステージから再開")
+    parser.add_argument("--host", default=os.environ.get("PODCAST_DAEMON_HOST", "127.0.0.1"),
+                        help="状態エンドポイントのホスト")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PODCAST_DAEMON_PORT", "8765")),
+                        help="状態エンドポイントのポート（0で自動割り当て、-1で無効）")
+    args = parser.parse_args(argv)
+
+    shows = load_shows(args.config) if args.config else [resolve_show()]
+    if args.show:
+        shows = [show for show in shows if show["name"] in args.show]
+    if not shows:
+        print("❌ 生成する番組がありません")
+        return
+
+    daemon = PodcastDaemon(
+        shows,
+        schedule=args.schedule,
+        publish=args.publish,
+        github_repo=os.environ.get("GITHUB_REPOSITORY", "your-username/ai-podcast-generator"),
+        use_cache=False if args.no_cache else None,
+        resume=args.resume,
+        host=args.host,
+        port=None if args.port < 0 else args.port,
+    )
+    # SIGTERM（systemctl stopなど）で実行中の生成が終わってから停止
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
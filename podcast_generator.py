@@ -1,50 +1,249 @@
+import argparse
+import hashlib
+import json
 import os
-import struct
+import queue
+import threading
+import time
 from datetime import datetime
+from urllib.parse import quote_plus
 from google import genai
-from google.genai import types
-import requests
-from bs4 import BeautifulSoup
+from disk_cache import DiskCache
+from feed_parser import parse_feed_items
+from news_dedup import StoryIndex, news_path
+from news_fetcher import NewsFetcher
+from audio_encoder import AudioEncoder
+from audio_metadata import get_audio_duration
+from audio_postprocess import AudioPostProcessor
+from cassette import Cassette
+from episode_catalog import file_sha256, open_catalog
+from gemini_scheduler import PRIORITY_SCRIPT, GeminiScheduler, estimate_tokens
+from run_checkpoint import RunCheckpoint
+from run_metrics import RunMetrics
+from show_config import feed_state_dir, resolve_show
+from tts_engine import TTSEngine, parse_audio_mime_type
+from wav_writer import WavWriter, wav_header
+
+
+SCRIPT_MODEL = "gemini-2.0-flash-exp"
+
+# 既定のニュースソース
+NEWS_SOURCES = [
+    "https://news.google.com/rss/search?q=AI+artificial+intelligence+when:1d&hl=ja&gl=JP&ceid=JP:ja",
+    "https://techcrunch.com/category/artificial-intelligence/feed/",
+]
+
+# 各ソースから台本に使うニュースの件数と、重複を除外する前に読む件数
+NEWS_PER_SOURCE = 3
+NEWS_FEED_WINDOW = 10
+
+# トピック別エディションのニュースソース（Google Newsの検索RSS）
+TOPIC_SOURCE_TEMPLATE = "https://news.google.com/rss/search?q={query}+when:1d&{locale}"
+
+# 番組の言語（RSSの<language>）ごとのGoogle Newsの地域・言語の指定
+# 表にない "xx-YY" 形式の言語は地域YYの言語xxとして扱う
+GOOGLE_NEWS_LOCALES = {
+    "ja": "hl=ja&gl=JP&ceid=JP:ja",
+    "en": "hl=en-US&gl=US&ceid=US:en",
+    "en-us": "hl=en-US&gl=US&ceid=US:en",
+    "en-gb": "hl=en-GB&gl=GB&ceid=GB:en",
+}
+
+
+def google_news_locale(language):
+    """番組の言語からGoogle Newsの地域・言語の指定を作成（不明な場合は日本語）"""
+    language = (language or "ja").lower()
+    if language in GOOGLE_NEWS_LOCALES:
+        return GOOGLE_NEWS_LOCALES[language]
+    code, _, region = language.partition("-")
+    if region:
+        return f"hl={code}-{region.upper()}&gl={region.upper()}&ceid={region.upper()}:{code}"
+    print(f"⚠️ Google Newsの地域が不明な言語のため日本語版で検索します: {language}")
+    return GOOGLE_NEWS_LOCALES["ja"]
+
+
+def topic_sources(topic, language="ja"):
+    """トピックのニュースソース一覧を作成（番組の言語の地域版のGoogle Newsで検索）"""
+    return [TOPIC_SOURCE_TEMPLATE.format(query=quote_plus(topic), locale=google_news_locale(language))]
+
+
+SCRIPT_PROMPT_TEMPLATE = """以下の最新AIニュースを基に、2人の話者による5分程度のポッドキャスト台本を作成してください。
+
+【ニュース内容】
+{news_summary}
+
+【台本の要件】
+- Speaker 1: 明るく親しみやすい女性ホスト（導入と進行役）
+- Speaker 2: 落ち着いた男性解説者（技術的な解説担当）
+- 自然な会話形式で、聞き手が理解しやすいように説明
+- 各ニュースについて簡潔に議論
+- 冒頭に日付と挨拶、最後に締めの言葉を入れる
+
+【出力形式】
+Speaker 1: （セリフ）
+Speaker 2: （セリフ）
+という形式で出力してください。"""
+
+# トピック別エディションの既定のプロンプト（番組にpromptがない場合）
+TOPIC_SCRIPT_PROMPT_TEMPLATE = """以下の「{topic}」に関する最新ニュースを基に、2人の話者による5分程度のポッドキャスト台本を作成してください。
+
+【ニュース内容】
+{news_summary}
+
+【台本の要件】
+- Speaker 1: 明るく親しみやすい女性ホスト（導入と進行役）
+- Speaker 2: 落ち着いた男性解説者（技術的な解説担当）
+- 自然な会話形式で、聞き手が理解しやすいように説明
+- 各ニュースについて簡潔に議論
+- 冒頭に日付と挨拶、最後に締めの言葉を入れる
+- 台本は番組の言語（言語コード: {language}）で書く
+
+【出力形式】
+Speaker 1: （セリフ）
+Speaker 2: （セリフ）
+という形式で出力してください。"""
 
 
 class PodcastGenerator:
-    def __init__(self):
+    def __init__(self, use_cache=None, show=None, cassette=None, rate_share=1):
+        """
+        show: 番組の設定（show_config参照）。省略時は既定のAIニュース番組
+        cassette: 通信を記録・再生するCassette。省略時は環境変数 PODCAST_CASSETTE から作成
+        rate_share: 同時に実行する生成器の数（Gemini APIのレート制限をこの数で分け合う）
+        """
+        self.show = resolve_show(show)
+        self.output_dir = self.show["output_dir"]
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+        if self.show["sources"]:
+            self.news_sources = list(self.show["sources"])
+        elif self.show["topic"]:
+            self.news_sources = topic_sources(self.show["topic"], self.show["language"])
+        else:
+            self.news_sources = NEWS_SOURCES
+        if self.show["prompt"]:
+            self.prompt_template = self.show["prompt"]
+        elif self.show["topic"]:
+            self.prompt_template = TOPIC_SCRIPT_PROMPT_TEMPLATE
+        else:
+            self.prompt_template = SCRIPT_PROMPT_TEMPLATE
+        # 実行ごとのチェックポイント（--resume用）
+        self.runs_dir = os.path.join(self.output_dir, "runs")
+        # ステージごとの計測値（PODCAST_METRICS_DIRに出力）
+        self.metrics = RunMetrics(
+            "generate", labels={"show": self.show["name"]} if self.show["name"] else None
+        )
+
+        self.cassette = cassette or Cassette.from_env()
+        replaying = bool(self.cassette and self.cassette.replaying)
+
         self.gemini_api_key = os.environ.get("GEMINI_API_KEY")
-        self.client = genai.Client(api_key=self.gemini_api_key)
-        
-    def search_ai_news(self):
+        # 再生時はAPIに接続しない
+        self.client = None if replaying else genai.Client(api_key=self.gemini_api_key)
+        if self.cassette:
+            self.client = self.cassette.wrap_client(self.client)
+        # 台本生成・音声合成の全リクエストをレート制限・再試行付きで送信
+        # （再生時はGEMINI_RATE_LIMITSを指定しない限り記録時の応答時間だけを再現する）
+        if replaying and not os.environ.get("GEMINI_RATE_LIMITS"):
+            self.scheduler = GeminiScheduler.unlimited()
+        else:
+            self.scheduler = GeminiScheduler.from_env(share=rate_share)
+        self.cache_dir = os.environ.get("PODCAST_CACHE_DIR", ".cache")
+        self.feed_cache = DiskCache(
+            os.path.join(self.cache_dir, "feeds"),
+            max_bytes=int(os.environ.get("FEED_CACHE_MAX_BYTES", str(20 * 1024 * 1024))),
+        )
+        self.news_fetcher = NewsFetcher(
+            max_workers=int(os.environ.get("NEWS_FETCH_WORKERS", "16")),
+            per_host_limit=int(os.environ.get("NEWS_FETCH_PER_HOST", "4")),
+            deadline=float(os.environ.get("NEWS_FETCH_DEADLINE", "20")),
+            cache=self.feed_cache,
+        )
+        # use_cache=False または PODCAST_NO_CACHE=1 で台本・音声キャッシュを無効化
+        if use_cache is None:
+            use_cache = os.environ.get("PODCAST_NO_CACHE", "") not in ("1", "true")
+        self.use_cache = use_cache
+        self.script_cache = DiskCache(
+            os.path.join(self.cache_dir, "scripts"),
+            max_bytes=int(os.environ.get("SCRIPT_CACHE_MAX_BYTES", str(10 * 1024 * 1024))),
+            ttl=float(os.environ.get("SCRIPT_CACHE_TTL", str(7 * 86400))),
+        )
+        self.tts = TTSEngine(
+            self.client,
+            cache=DiskCache(
+                os.path.join(self.cache_dir, "tts"),
+                max_bytes=int(os.environ.get("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+            ),
+            voices=self.show["voices"] or None,
+            use_cache=use_cache,
+            # 音声合成のレート制限（既定10rpm）で待たないよう、既定で複数のセリフをまとめて合成
+            max_chunk_chars=int(os.environ.get("TTS_CHUNK_CHARS", "1200")),
+            concurrency=int(os.environ.get("TTS_CONCURRENCY", "1")),
+            scheduler=self.scheduler,
+        )
+        # 音量の正規化・ピークリミッター・無音の短縮（PODCAST_POSTPROCESS=0で無効）
+        self.postprocessor = AudioPostProcessor.from_env()
+        self.encoder = AudioEncoder(
+            os.environ.get("PODCAST_AUDIO_FORMAT", "wav"),
+            bitrate=os.environ.get("PODCAST_AUDIO_BITRATE"),
+        )
+        # 放送履歴は番組ごとのフィードのストアに置く（RSSフィードの更新時に登録される）
+        self.story_index = StoryIndex(
+            os.path.join(feed_state_dir(self.show), "story_index.json"),
+            retention_days=int(os.environ.get("STORY_HISTORY_DAYS", "30")),
+        )
+
+        if self.cassette:
+            self.use_cassette()
+
+    def use_cassette(self):
+        """
+        フィードの取得とGeminiの呼び出しをカセット経由にする
+
+        記録時と再生時で同じリクエストを送るよう、フィード・台本・音声のキャッシュと
+        保存済みの放送履歴は使わない（履歴はメモリ上のみで保存しない）。
+        """
+        session = self.news_fetcher.session
+        adapter = self.cassette.http_adapter(session.get_adapter("https://"))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self.news_fetcher.cache = None
+        self.use_cache = False
+        self.tts.use_cache = False
+        self.tts.client = self.client
+        self.story_index = StoryIndex(retention_days=self.story_index.retention_days)
+        mode = "記録" if self.cassette.mode == "record" else f"再生 ({self.cassette.speed}倍速)"
+        print(f"📼 カセットを{mode}: {self.cassette.directory}")
+
+    def search_ai_news(self, news_sources=None):
         """最新のAIニュースを検索"""
         print("🔍 AIニュースを検索中...")
         
         # Google検索APIまたはニュースサイトのRSSを使用
         # ここでは例として複数のAIニュースソースを統合
-        news_sources = [
-            "https://news.google.com/rss/search?q=AI+artificial+intelligence+when:1d&hl=ja&gl=JP&ceid=JP:ja",
-            "https://techcrunch.com/category/artificial-intelligence/feed/",
-        ]
+        news_sources = news_sources or self.news_sources
         
+        # 全ソースを並列に取得（結果はソース順）
+        results = [items or [] for items in self.news_fetcher.fetch_all(news_sources, self.parse_news_feed)]
+        self.metrics.set("bytes_fetched", self.news_fetcher.bytes_fetched)
+        self.metrics.set("feeds_not_modified", self.news_fetcher.not_modified)
+        self.metrics.add("items_parsed", sum(len(items) for items in results))
+
+        # 他ソースや過去の放送と重複するニュースを除外してから、各ソースの件数を絞る
+        # （放送済みのニュースで枠が埋まらないよう、各ソースの先頭NEWS_FEED_WINDOW件から選ぶ）
+        new_items = {id(item) for item in self.story_index.filter_new(
+            [item for items in results for item in items]
+        )}
         news_items = []
-        for source in news_sources:
-            try:
-                response = requests.get(source, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'xml')
-                    items = soup.find_all('item')[:3]  # 各ソースから3件
-                    for item in items:
-                        title = item.find('title').text if item.find('title') else ""
-                        description = item.find('description').text if item.find('description') else ""
-                        link = item.find('link').text if item.find('link') else ""
-                        
-                        news_items.append({
-                            'title': title,
-                            'description': description,
-                            'link': link
-                        })
-            except Exception as e:
-                print(f"ニュース取得エラー ({source}): {e}")
+        for items in results:
+            news_items.extend([item for item in items if id(item) in new_items][:NEWS_PER_SOURCE])
                 
         return news_items[:5]  # 最大5件のニュース
     
+    def parse_news_feed(self, content):
+        """RSSフィードからニュース項目を抽出"""
+        return parse_feed_items(content, limit=NEWS_FEED_WINDOW)
+    
     def generate_podcast_script(self, news_items):
         """ニュースをポッドキャスト台本に変換"""
         print("📝 ポッドキャスト台本を生成中...")
@@ -54,100 +253,77 @@ class PodcastGenerator:
             for i, item in enumerate(news_items)
         ])
         
-        prompt = f"""以下の最新AIニュースを基に、2人の話者による5分程度のポッドキャスト台本を作成してください。
-
-【ニュース内容】
-{news_summary}
-
-【台本の要件】
-- Speaker 1: 明るく親しみやすい女性ホスト（導入と進行役）
-- Speaker 2: 落ち着いた男性解説者（技術的な解説担当）
-- 自然な会話形式で、聞き手が理解しやすいように説明
-- 各ニュースについて簡潔に議論
-- 冒頭に日付と挨拶、最後に締めの言葉を入れる
+        prompt = self.prompt_template.format(
+            news_summary=news_summary, topic=self.show["topic"], language=self.show["language"]
+        )
 
-【出力形式】
-Speaker 1: （セリフ）
-Speaker 2: （セリフ）
-という形式で出力してください。"""
+        cache_key = self.script_cache_key(prompt)
+        if self.use_cache:
+            cached = self.script_cache.get(cache_key)
+            if cached:
+                print("✅ 台本生成完了（キャッシュ）")
+                return cached
 
-        response = self.client.models.generate_content(
-            model="gemini-2.0-flash-exp",
-            contents=prompt
+        response = self.scheduler.call(
+            SCRIPT_MODEL,
+            lambda: self.client.models.generate_content(
+                model=SCRIPT_MODEL,
+                contents=prompt
+            ),
+            priority=PRIORITY_SCRIPT,
+            estimated_tokens=estimate_tokens(prompt),
         )
         
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            self.metrics.add("script_prompt_tokens", usage.prompt_token_count or 0)
+            self.metrics.add("script_response_tokens", usage.candidates_token_count or 0)
+
         script = response.text
+        if script:
+            self.script_cache.set(cache_key, script)
         print("✅ 台本生成完了")
         return script
+
+    def script_cache_key(self, prompt):
+        """モデル名と、空白を正規化した送信するプロンプトからキャッシュキーを生成"""
+        # テンプレートではなく置き換え後のプロンプトを使い、番組のトピック・言語ごとに分ける
+        payload = json.dumps(
+            {"model": SCRIPT_MODEL, "prompt": " ".join(prompt.split())},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
     
-    def generate_audio(self, script):
+    def generate_audio(self, script, episode_name=None):
         """台本から音声を生成"""
         print("🎙️ 音声を生成中...")
         
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(text=f"以下の台本を自然な会話調で読み上げてください:\n\n{script}"),
-                ],
-            ),
-        ]
-        
-        generate_content_config = types.GenerateContentConfig(
-            temperature=1,
-            response_modalities=["audio"],
-            speech_config=types.SpeechConfig(
-                multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                    speaker_voice_configs=[
-                        types.SpeakerVoiceConfig(
-                            speaker="Speaker 1",
-                            voice_config=types.VoiceConfig(
-                                prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                    voice_name="Zephyr"
-                                )
-                            ),
-                        ),
-                        types.SpeakerVoiceConfig(
-                            speaker="Speaker 2",
-                            voice_config=types.VoiceConfig(
-                                prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                    voice_name="Puck"
-                                )
-                            ),
-                        ),
-                    ]
-                ),
-            ),
-        )
-        
-        audio_data = b""
-        mime_type = None
-        
-        for chunk in self.client.models.generate_content_stream(
-            model="gemini-2.5-flash-preview-tts",
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if (chunk.candidates and 
-                chunk.candidates[0].content and 
-                chunk.candidates[0].content.parts):
-                
-                part = chunk.candidates[0].content.parts[0]
-                if part.inline_data and part.inline_data.data:
-                    audio_data += part.inline_data.data
-                    if mime_type is None:
-                        mime_type = part.inline_data.mime_type
-        
-        # WAV形式に変換
-        if mime_type and "audio/L" in mime_type:
-            audio_data = self.convert_to_wav(audio_data, mime_type)
-        
-        # ファイルに保存
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"podcast_{timestamp}.wav"
+        episode_name = episode_name or datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(self.output_dir, f"podcast_{episode_name}.wav")
         
-        with open(filename, "wb") as f:
-            f.write(audio_data)
+        # TTS_CHUNK_CHARS（既定1200文字）までのセリフをまとめたチャンク単位（0ならセリフ単位）で合成
+        # キャッシュ済みのセグメントは再利用し、TTS_CONCURRENCYの上限まで並列に合成
+        # 受信した音声は順にディスクへ追記し、メモリに全体を保持しない
+        start = time.perf_counter()
+        with WavWriter(filename) as writer:
+            for audio_data, mime_type in self.tts.iter_audio(script):
+                if not mime_type or "audio/L" not in mime_type:
+                    raise RuntimeError(f"未対応の音声形式です: {mime_type}")
+                if writer.data_size == 0:
+                    parameters = self.parse_audio_mime_type(mime_type)
+                    writer.set_format(parameters["rate"], parameters["bits_per_sample"])
+                    self.metrics.set("ttfa_seconds", round(time.perf_counter() - start, 4))
+                writer.write(audio_data)
+
+        # 実時間比（合成にかかった時間 / 音声の長さ）
+        elapsed = time.perf_counter() - start
+        audio_seconds = writer.data_size / (writer.sample_rate * writer.bits_per_sample // 8)
+        self.metrics.add("tts_wall_seconds", round(elapsed, 4))
+        self.metrics.add("audio_seconds", audio_seconds)
+        values = self.metrics.values
+        if values["audio_seconds"]:
+            self.metrics.set("tts_rtf", round(values["tts_wall_seconds"] / values["audio_seconds"], 4))
         
         print(f"✅ 音声生成完了: {filename}")
         return filename
@@ -155,71 +331,189 @@ Speaker 2: （セリフ）
     def convert_to_wav(self, audio_data: bytes, mime_type: str) -> bytes:
         """音声データをWAV形式に変換"""
         parameters = self.parse_audio_mime_type(mime_type)
-        bits_per_sample = parameters["bits_per_sample"]
-        sample_rate = parameters["rate"]
-        num_channels = 1
-        data_size = len(audio_data)
-        bytes_per_sample = bits_per_sample // 8
-        block_align = num_channels * bytes_per_sample
-        byte_rate = sample_rate * block_align
-        chunk_size = 36 + data_size
-        
-        header = struct.pack(
-            "<4sI4s4sIHHIIHH4sI",
-            b"RIFF", chunk_size, b"WAVE", b"fmt ",
-            16, 1, num_channels, sample_rate,
-            byte_rate, block_align, bits_per_sample,
-            b"data", data_size
-        )
+        header = wav_header(len(audio_data), parameters["rate"], parameters["bits_per_sample"])
         return header + audio_data
     
     def parse_audio_mime_type(self, mime_type: str) -> dict:
         """MIMEタイプから音声パラメータを抽出"""
-        bits_per_sample = 16
-        rate = 24000
-        
-        parts = mime_type.split(";")
-        for param in parts:
-            param = param.strip()
-            if param.lower().startswith("rate="):
-                try:
-                    rate = int(param.split("=", 1)[1])
-                except (ValueError, IndexError):
-                    pass
-            elif param.startswith("audio/L"):
-                try:
-                    bits_per_sample = int(param.split("L", 1)[1])
-                except (ValueError, IndexError):
-                    pass
-        
-        return {"bits_per_sample": bits_per_sample, "rate": rate}
+        return parse_audio_mime_type(mime_type)
     
-    def run(self):
-        """メイン実行フロー"""
-        print("=" * 50)
-        print("🎙️ AIニュースポッドキャスト自動生成")
-        print("=" * 50)
-        
-        # 1. ニュース検索
-        news_items = self.search_ai_news()
-        if not news_items:
-            print("❌ ニュースが見つかりませんでした")
-            return None
-        
-        print(f"✅ {len(news_items)}件のニュースを取得")
+    def prepare_episode(self, news_sources=None, episode_name=None, checkpoint=None):
+        """
+        ニュース検索と台本生成（音声合成の前段）
+
+        台本を保存し、(ニュース, 台本ファイル名, 台本) を返す。ニュースがなければNone。
+        checkpointを渡すと、完了済みのステージは保存した結果を再利用する。
+        """
+        # 1. ニュース検索（再開時は前回取得したニュースで台本を作る）
+        if checkpoint and checkpoint.reached("news"):
+            news_items = checkpoint.load_json("news.json")
+            print(f"⏩ 取得済みのニュースを再利用 ({len(news_items)}件)")
+        else:
+            with self.metrics.stage("news"):
+                news_items = self.search_ai_news(news_sources)
+            if not news_items:
+                print("❌ ニュースが見つかりませんでした")
+                return None
+            print(f"✅ {len(news_items)}件のニュースを取得")
+            if checkpoint:
+                checkpoint.save_json("news.json", news_items)
+                checkpoint.update("news")
         
         # 2. 台本生成
-        script = self.generate_podcast_script(news_items)
+        if checkpoint and checkpoint.reached("script"):
+            # 台本ファイルがない環境（CIの再実行など）ではチェックポイントの写しから復元
+            script_filename = checkpoint.state["script_filename"]
+            script = checkpoint.load_json("script.json")
+            if not os.path.exists(script_filename):
+                with open(script_filename, "w", encoding="utf-8") as f:
+                    f.write(script)
+            self.save_episode_news(script_filename, news_items)
+            print(f"⏩ 生成済みの台本を再利用: {script_filename}")
+            return news_items, script_filename, script
+
+        with self.metrics.stage("script"):
+            script = self.generate_podcast_script(news_items)
         
         # 台本を保存
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        script_filename = f"script_{timestamp}.txt"
+        episode_name = episode_name or datetime.now().strftime("%Y%m%d_%H%M%S")
+        script_filename = os.path.join(self.output_dir, f"script_{episode_name}.txt")
         with open(script_filename, "w", encoding="utf-8") as f:
             f.write(script)
+        self.save_episode_news(script_filename, news_items)
         print(f"✅ 台本保存: {script_filename}")
+        if checkpoint:
+            checkpoint.save_json("script.json", script)
+            checkpoint.update("script", script_filename=script_filename)
+        return news_items, script_filename, script
+
+    def save_episode_news(self, script_filename, news_items):
+        """
+        エピソードで扱ったニュースを台本の隣に保存
+
+        放送履歴への登録はRSSフィードの更新時に行う（update_rss.RSSUpdater.record_stories）。
+        生成後に公開できなかった場合に、再実行で同じニュースが除外されないようにするため。
+        """
+        with open(news_path(script_filename), "w", encoding="utf-8") as f:
+            json.dump(news_items, f, ensure_ascii=False)
+
+    def produce_episode(self, script, script_filename, episode_name=None, checkpoint=None):
+        """音声合成・エンコード・カタログ登録（音声合成以降の後段）"""
+        state = checkpoint.state if checkpoint else {}
+        # 音声ファイルが残っていない場合は、受信済みのセグメントから作り直す
+        has_audio = bool(state.get("audio_filename")) and os.path.exists(state["audio_filename"])
+
+        # 3. 音声生成（再開時は受信済みのセグメントを再利用）
+        if checkpoint and checkpoint.reached("audio") and has_audio:
+            audio_filename = state["audio_filename"]
+            print(f"⏩ 生成済みの音声を再利用: {audio_filename}")
+        else:
+            self.tts.checkpoint = checkpoint.segment_cache() if checkpoint else None
+            try:
+                with self.metrics.stage("tts"):
+                    audio_filename = self.generate_audio(script, episode_name)
+            finally:
+                self.tts.checkpoint = None
+            if checkpoint:
+                checkpoint.update("audio", audio_filename=audio_filename)
+
+        # 4. ラウドネス正規化・無音の短縮
+        if self.postprocessor and not (checkpoint and checkpoint.reached("processed") and has_audio):
+            with self.metrics.stage("postprocess"):
+                result = self.postprocessor.process(audio_filename)
+            if result:
+                if result["input_lufs"] is not None:
+                    self.metrics.set("input_lufs", result["input_lufs"])
+                self.metrics.set("loudness_gain_db", result["gain_db"])
+                self.metrics.add("limited_seconds", result["limited_seconds"])
+                self.metrics.add("silence_removed_seconds", result["silence_removed_seconds"])
+            if checkpoint:
+                checkpoint.update("processed", audio_filename=audio_filename)
+
+        # 5. 圧縮形式にエンコード（PODCAST_AUDIO_FORMAT）
+        if checkpoint and checkpoint.reached("encoded") and has_audio:
+            audio_filename = state["audio_filename"]
+        else:
+            with self.metrics.stage("encode"):
+                encoded_filename = self.encoder.encode(audio_filename)
+            if encoded_filename != audio_filename:
+                os.remove(audio_filename)
+                audio_filename = encoded_filename
+            if checkpoint:
+                checkpoint.update("encoded", audio_filename=audio_filename)
+
+        # エピソードをカタログに登録（以降のステージはカタログから参照）
+        self.metrics.add("audio_bytes", os.path.getsize(audio_filename))
+        if not (checkpoint and checkpoint.reached("registered")):
+            catalog = open_catalog(self.show["catalog"] or None)
+            catalog.add_episode(
+                audio_filename,
+                script_path=script_filename,
+                size=os.path.getsize(audio_filename),
+                duration=get_audio_duration(audio_filename),
+                content_hash=file_sha256(audio_filename),
+            )
+            catalog.close()
+            if checkpoint:
+                checkpoint.update("registered")
+        return audio_filename
+
+    def reset_metrics(self):
+        """計測値を次の実行用に初期化（同じインスタンスで繰り返し生成する場合）"""
+        self.metrics = RunMetrics("generate", labels=self.metrics.labels)
+        self.news_fetcher.bytes_fetched = 0
+        self.news_fetcher.not_modified = 0
+        self.tts.reset_stats()
+
+    def finish_metrics(self, status):
+        """TTSの集計値を加えて実行の計測値を書き出す"""
+        for name, value in self.tts.stats.items():
+            self.metrics.set(f"tts_{name}", value)
+        return self.metrics.finish(status)
+
+    def run(self, resume=False):
+        """
+        メイン実行フロー
+
+        各ステージの完了時に runs/ 以下へチェックポイントを保存する。
+        resume=Trueの場合は未完了の最新の実行を、完了済みのステージから再開する。
+        成否にかかわらず、ステージごとの計測値を書き出す。
+        """
+        status = "failed"
+        try:
+            audio_filename = self._run(resume)
+            status = "success" if audio_filename else "no_news"
+            return audio_filename
+        finally:
+            self.finish_metrics(status)
+
+    def _run(self, resume):
+        print("=" * 50)
+        print("🎙️ AIニュースポッドキャスト自動生成")
+        print("=" * 50)
+
+        checkpoint = RunCheckpoint.find_latest(self.runs_dir)
+        if resume and checkpoint:
+            print(f"⏩ 前回の実行を再開: {checkpoint.episode_name} (完了済み: {checkpoint.stage})")
+        else:
+            if checkpoint:
+                print(f"⚠️ 未完了の実行を破棄して新しく生成します（再開するには--resumeを指定）: "
+                      f"{checkpoint.episode_name}")
+            checkpoint = RunCheckpoint.create(
+                self.runs_dir, datetime.now().strftime("%Y%m%d_%H%M%S")
+            )
+        episode_name = checkpoint.episode_name
+        # 前回の実行以降に公開されたエピソードの履歴を読み直す
+        self.story_index.load()
         
-        # 3. 音声生成
-        audio_filename = self.generate_audio(script)
+        prepared = self.prepare_episode(episode_name=episode_name, checkpoint=checkpoint)
+        if not prepared:
+            checkpoint.complete()
+            return None
+        _, script_filename, script = prepared
+
+        audio_filename = self.produce_episode(script, script_filename, episode_name, checkpoint)
+        checkpoint.complete()
         
         print("=" * 50)
         print("🎉 ポッドキャスト生成完了!")
@@ -229,7 +523,112 @@ Speaker 2: （セリフ）
         
         return audio_filename
 
+    def run_batch(self, editions):
+        """
+        複数エピソードをまとめて生成
+
+        editions: ニュースソースの一覧（Noneは既定のソース）のリスト
+        ニュース検索と台本生成を別スレッドで先行させ、エピソードNの音声合成中に
+        エピソードN+1の検索・台本生成を進める。Geminiのクライアントと
+        HTTPのコネクションプールは全エピソードで共有する。
+        生成した音声ファイル名のリスト（失敗したエピソードはNone）を返す。
+        """
+        print("=" * 50)
+        print(f"🎙️ AIニュースポッドキャスト一括生成 ({len(editions)}エピソード)")
+        print("=" * 50)
+
+        batch_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 先行する前段は1エピソード分まで（台本を作りすぎない）
+        prepared_queue = queue.Queue(maxsize=1)
+        self.story_index.load()
+        stage_seconds = {"prepare": 0.0, "produce": 0.0}
+        start = time.perf_counter()
+
+        def producer():
+            for index, news_sources in enumerate(editions):
+                episode_name = f"{batch_id}_{index + 1:02d}"
+                stage_start = time.perf_counter()
+                try:
+                    prepared = self.prepare_episode(news_sources, episode_name)
+                    if prepared:
+                        # 後続のエディションで同じニュースを選ばないよう、メモリ上の履歴へ登録
+                        # （保存はRSSフィードの更新時）
+                        self.story_index.add(prepared[0])
+                except Exception as e:
+                    print(f"❌ エピソード{index + 1}の台本生成に失敗: {e}")
+                    prepared = None
+                stage_seconds["prepare"] += time.perf_counter() - stage_start
+                prepared_queue.put((index, episode_name, prepared))
+            prepared_queue.put(None)
+
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+
+        results = [None] * len(editions)
+        while True:
+            job = prepared_queue.get()
+            if job is None:
+                break
+            index, episode_name, prepared = job
+            if not prepared:
+                continue
+            _, script_filename, script = prepared
+            stage_start = time.perf_counter()
+            try:
+                results[index] = self.produce_episode(script, script_filename, episode_name)
+            except Exception as e:
+                print(f"❌ エピソード{index + 1}の音声生成に失敗: {e}")
+            stage_seconds["produce"] += time.perf_counter() - stage_start
+        thread.join()
+
+        elapsed = time.perf_counter() - start
+        completed = sum(1 for result in results if result)
+        self.metrics.set("episodes", completed)
+        self.finish_metrics("success" if completed == len(editions) else "partial")
+        print("=" * 50)
+        print(f"🎉 一括生成完了: {completed}/{len(editions)}エピソード")
+        print(f"⏱️ 合計 {elapsed:.1f}秒 (検索・台本 {stage_seconds['prepare']:.1f}秒, "
+              f"音声 {stage_seconds['produce']:.1f}秒)")
+        for result in results:
+            if result:
+                print(f"🎵 音声: {result}")
+        print("=" * 50)
+        return results
+
+
+def main(argv=None):
+    """コマンドライン引数に従って生成し、音声ファイル名（一括生成ではそのリスト）を返す"""
+    parser = argparse.ArgumentParser(description="AIニュースポッドキャスト自動生成")
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを使わずに台本・音声を生成")
+    parser.add_argument("--resume", action="store_true",
+                        help="前回失敗した実行を完了済みのステージ・セグメントから再開")
+    parser.add_argument("--batch", type=int, default=0,
+                        help="既定のソースからN件のエピソードを続けて生成")
+    parser.add_argument("--topics", help="トピック別のエピソードを生成（カンマ区切り）")
+    parser.add_argument("--record", metavar="DIR", help="フィードとGeminiの応答をカセットに記録")
+    parser.add_argument("--replay", metavar="DIR", help="カセットに記録した応答で生成（通信しない）")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="再生速度の倍率（1: 記録時と同じ速度、0: 待ち時間なし）")
+    args = parser.parse_args(argv)
+
+    cassette = None
+    show = None
+    if args.record:
+        cassette = Cassette(args.record, mode="record")
+    elif args.replay:
+        cassette = Cassette(args.replay, mode="replay", speed=args.replay_speed)
+        # 再生で作ったエピソードは本番の出力・カタログに混ぜない
+        output_dir = os.path.join(args.replay, "output")
+        show = {"output_dir": output_dir, "catalog": os.path.join(output_dir, "episodes.db")}
+
+    generator = PodcastGenerator(use_cache=False if args.no_cache else None, show=show, cassette=cassette)
+    if args.topics:
+        topics = [topic.strip() for topic in args.topics.split(",") if topic.strip()]
+        return generator.run_batch([topic_sources(topic, generator.show["language"]) for topic in topics])
+    if args.batch:
+        return generator.run_batch([None] * args.batch)
+    return generator.run(resume=args.resume)
+
 
 if __name__ == "__main__":
-    generator = PodcastGenerator()
-    generator.run()
\ No newline at end of file
+    main()
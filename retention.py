@@ -0,0 +1,91 @@
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+
+def parse_pub_date(text):
+    """pubDate（RFC 822形式）をdatetimeに変換（解析できない場合はNone）"""
+    if not text:
+        return None
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class RetentionPolicy:
+    """
+    公開済みエピソードの保持ポリシー
+
+    経過日数・エピソード数・音声ファイルの合計バイト数のいずれか（複数可）で
+    上限を指定し、超えた分を古いエピソードから期限切れとする。0は無制限。
+    """
+
+    def __init__(self, max_age_days=0, max_episodes=0, max_bytes=0):
+        self.max_age_days = max_age_days
+        self.max_episodes = max_episodes
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls):
+        """環境変数 FEED_RETENTION_DAYS / FEED_RETENTION_EPISODES / FEED_RETENTION_MAX_MB から作成"""
+        return cls(
+            max_age_days=int(os.environ.get("FEED_RETENTION_DAYS", "0")),
+            max_episodes=int(os.environ.get("FEED_RETENTION_EPISODES", "0")),
+            max_bytes=int(float(os.environ.get("FEED_RETENTION_MAX_MB", "0")) * 1024 * 1024),
+        )
+
+    def is_enabled(self):
+        return bool(self.max_age_days or self.max_episodes or self.max_bytes)
+
+    def select_expired(self, entries, file_sizes, now=None):
+        """
+        期限切れのエピソードの位置（entriesのインデックス）を返す
+
+        entries: FeedStoreのインデックス（古い順）
+        file_sizes: エピソードごとの音声ファイル名 → ディスク上のサイズ
+        同じ内容の音声を複数のエピソードが参照する場合、バイト数は1回だけ数える。
+        """
+        expired = set()
+        count = len(entries)
+
+        if self.max_episodes and count > self.max_episodes:
+            expired.update(range(count - self.max_episodes))
+
+        if self.max_age_days:
+            now = now or datetime.now(timezone.utc)
+            cutoff = now - timedelta(days=self.max_age_days)
+            for position, entry in enumerate(entries):
+                published = parse_pub_date(entry.get("pub_date"))
+                if published is not None and published < cutoff:
+                    expired.add(position)
+
+        if self.max_bytes:
+            # 残すエピソードが参照する音声の合計が上限に収まるまで、古い順に期限切れにする
+            references = {}
+            for position, entry in enumerate(entries):
+                if position not in expired:
+                    name = audio_filename(entry)
+                    references[name] = references.get(name, 0) + 1
+            total = sum(file_sizes.get(name, 0) for name in references)
+
+            for position, entry in enumerate(entries):
+                if total <= self.max_bytes:
+                    break
+                if position in expired:
+                    continue
+                expired.add(position)
+                name = audio_filename(entry)
+                references[name] -= 1
+                if references[name] == 0:
+                    total -= file_sizes.get(name, 0)
+
+        return sorted(expired)
+
+
+def audio_filename(entry):
+    """インデックスのエンクロージャURLから音声ファイル名を取り出す"""
+    return os.path.basename(entry.get("url") or "")
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+
+from atomic_write import write_atomic
+from disk_cache import DiskCache
+
+
+# 生成パイプラインのステージ（この順に進む）
+STAGES = ["started", "news", "script", "audio", "processed", "encoded", "registered"]
+
+
+class RunCheckpoint:
+    """
+    1回の生成実行のチェックポイント
+
+    runs_dir/<エピソード名>/ に以下を保存し、途中で失敗しても
+    完了済みのステージ・セグメントから再開できるようにする。
+
+    - state.json: 完了したステージと、台本・音声などのファイル名
+    - news.json: 取得したニュース（再開時に同じニュースで台本を作るため）
+    - segments/: 受信済みのTTSセグメント（削除されないキャッシュ）
+
+    全ステージが完了したらディレクトリごと削除する。
+    """
+
+    def __init__(self, run_dir):
+        self.run_dir = run_dir
+        self.state_path = os.path.join(run_dir, "state.json")
+        self.state = {"stage": "started"}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    @classmethod
+    def create(cls, runs_dir, episode_name):
+        """
+        新しい実行のチェックポイントを作成
+
+        再開できるのは最新の未完了の実行だけなので、それより前の未完了の実行
+        （受信済みのセグメントを含む）は削除する。
+        """
+        if os.path.isdir(runs_dir):
+            for name in os.listdir(runs_dir):
+                path = os.path.join(runs_dir, name)
+                if name != episode_name and os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+        checkpoint = cls(os.path.join(runs_dir, episode_name))
+        os.makedirs(checkpoint.run_dir, exist_ok=True)
+        checkpoint.update("started", episode_name=episode_name)
+        return checkpoint
+
+    @classmethod
+    def find_latest(cls, runs_dir):
+        """未完了の実行のうち最新のものを返す（なければNone）"""
+        if not os.path.isdir(runs_dir):
+            return None
+        for name in sorted(os.listdir(runs_dir), reverse=True):
+            if os.path.exists(os.path.join(runs_dir, name, "state.json")):
+                return cls(os.path.join(runs_dir, name))
+        return None
+
+    @property
+    def episode_name(self):
+        return self.state.get("episode_name") or os.path.basename(self.run_dir)
+
+    @property
+    def stage(self):
+        return self.state.get("stage", "started")
+
+    def reached(self, stage):
+        """指定したステージまで完了しているか"""
+        return STAGES.index(self.stage) >= STAGES.index(stage)
+
+    def update(self, stage, **fields):
+        """ステージの完了を記録（state.jsonの書き換えを確定点とする）"""
+        self.state.update(fields)
+        self.state["stage"] = stage
+        write_atomic(
+            self.state_path,
+            json.dumps(self.state, ensure_ascii=False).encode("utf-8"),
+        )
+
+    def save_json(self, name, data):
+        write_atomic(
+            os.path.join(self.run_dir, name),
+            json.dumps(data, ensure_ascii=False).encode("utf-8"),
+        )
+
+    def load_json(self, name):
+        with open(os.path.join(self.run_dir, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def segment_cache(self):
+        """受信済みのTTSセグメントを保存するキャッシュ"""
+        return DiskCache(os.path.join(self.run_dir, "segments"), max_bytes=None)
+
+    def complete(self):
+        """実行の完了後にチェックポイントを削除"""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from atomic_write import write_atomic
+
+
+def peak_rss_bytes():
+    """このプロセス（と終了済みの子プロセス）の最大常駐メモリ（バイト、取得できない環境ではNone）"""
+    if resource is None:
+        return None
+    # LinuxはKB単位、macOSはバイト単位
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class RunMetrics:
+    """
+    1回の実行のステージごとの計測値
+
+    stage()でステージの所要時間を計測し、add()/set()で取得バイト数・トークン数などの
+    値を記録する。finish()で実行の記録をJSON Lines（履歴）に追記し、
+    Prometheusのtextfile collector用のファイルを書き出す。
+
+    出力先は環境変数 PODCAST_METRICS_DIR（既定: metrics）。空文字の場合は出力しない。
+    """
+
+    def __init__(self, component, labels=None, directory=None):
+        self.component = component
+        self.labels = dict(labels or {})
+        if directory is None:
+            directory = os.environ.get("PODCAST_METRICS_DIR", "metrics")
+        self.directory = directory
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.values = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """ステージの所要時間を計測（同じステージを複数回計測した場合は合計）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def add(self, name, value):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self.values[name] = value
+
+    def record(self, status):
+        """実行の記録（JSONに書き出す内容）を作成"""
+        return {
+            "component": self.component,
+            "labels": self.labels,
+            "started_at": self.started_at.isoformat(),
+            "status": status,
+            "wall_seconds": round(time.perf_counter() - self.start, 4),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "values": dict(self.values),
+        }
+
+    def prometheus_text(self, record):
+        """Prometheusのテキスト形式に変換（全てgauge）"""
+        labels = {"component": self.component, **self.labels}
+        base = ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items())
+
+        lines = [
+            "# HELP podcast_run_success 1 if the last run succeeded",
+            "# TYPE podcast_run_success gauge",
+            f"podcast_run_success{{{base}}} {1 if record['status'] == 'success' else 0}",
+            "# HELP podcast_run_timestamp_seconds Unix time the last run started",
+            "# TYPE podcast_run_timestamp_seconds gauge",
+            f"podcast_run_timestamp_seconds{{{base}}} {self.started_at.timestamp():.0f}",
+            "# HELP podcast_run_wall_seconds Wall time of the last run",
+            "# TYPE podcast_run_wall_seconds gauge",
+            f"podcast_run_wall_seconds{{{base}}} {record['wall_seconds']}",
+        ]
+        if record["peak_rss_bytes"] is not None:
+            lines += [
+                "# HELP podcast_peak_rss_bytes Peak resident set size of the last run",
+                "# TYPE podcast_peak_rss_bytes gauge",
+                f"podcast_peak_rss_bytes{{{base}}} {record['peak_rss_bytes']}",
+            ]
+        if record["stages"]:
+            lines += [
+                "# HELP podcast_stage_seconds Wall time per stage of the last run",
+                "# TYPE podcast_stage_seconds gauge",
+            ]
+            for name, seconds in record["stages"].items():
+                lines.append(f'podcast_stage_seconds{{{base},stage="{_label_value(name)}"}} {seconds}')
+        for name, value in record["values"].items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            metric = f"podcast_{_metric_name(name)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric}{{{base}}} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def finish(self, status="success"):
+        """実行の記録を書き出して返す"""
+        record = self.record(status)
+        if not self.directory:
+            return record
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            name = "_".join([self.component] + [str(value) for value in self.labels.values()])
+            name = _metric_name(name)
+            with open(os.path.join(self.directory, "runs.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            write_atomic(
+                os.path.join(self.directory, f"{name}.prom"),
+                self.prometheus_text(record).encode("utf-8"),
+                permissions=0o644,
+            )
+        except OSError as e:
+            print(f"⚠️ メトリクスの書き出しに失敗: {e}")
+            return record
+
+        memory = ""
+        if record["peak_rss_bytes"] is not None:
+            memory = f", 最大メモリ {record['peak_rss_bytes'] / 1024 / 1024:.0f} MB"
+        print(f"📈 メトリクス: {record['wall_seconds']:.1f}秒{memory} → {self.directory}/")
+        return record
@@ -0,0 +1,98 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from show_config import load_shows
+
+
+def run_show(show, publish=False, github_repo=None, use_cache=None, rate_share=1):
+    """
+    1番組分の生成（とRSS更新）をワーカープロセスで実行
+
+    rate_share: 同時に実行するワーカー数（Gemini APIのレート制限を分け合う）
+    (番組名, 音声ファイル名, 所要秒数) を返す。
+    """
+    # 重いモジュールはワーカー内で読み込む
+    from podcast_generator import PodcastGenerator
+    from update_rss import RSSUpdater
+
+    start = time.perf_counter()
+    generator = PodcastGenerator(use_cache=use_cache, show=show, rate_share=rate_share)
+    audio_filename = generator.run()
+    if audio_filename and publish:
+        updater = RSSUpdater(github_repo, show=show)
+        published = False
+        try:
+            published = updater.update_rss()
+        finally:
+            updater.metrics.finish("success" if published else "failed")
+    return show["name"], audio_filename, time.perf_counter() - start
+
+
+def run_shows(shows, max_workers=None, publish=False, github_repo=None, use_cache=None):
+    """
+    複数の番組をプロセスプールで並列に生成
+
+    番組ごとに出力ディレクトリ・フィード・カタログが分かれているため、
+    ワーカー間で共有する状態はない（キャッシュはアトミックに書き込まれる）。
+    Gemini APIのレート制限は同じAPIキーの全ワーカーにかかるため、
+    各ワーカーの上限を同時に実行するワーカー数で割って分け合う。
+    """
+    # 処理の大半はAPI待ちのため、既定では全番組を同時に実行する
+    max_workers = min(max_workers or len(shows), len(shows))
+    print(f"📻 {len(shows)}番組を{max_workers}プロセスで生成します")
+
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(run_show, show, publish, github_repo, use_cache, max_workers): show["name"]
+            for show in shows
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                _, audio_filename, elapsed = future.result()
+            except Exception as e:
+                print(f"❌ {name}: 生成に失敗しました: {e}")
+                results[name] = None
+                continue
+            results[name] = audio_filename
+            status = "✅" if audio_filename else "⚠️"
+            print(f"{status} {name}: {audio_filename} ({elapsed:.1f}秒)")
+
+    elapsed = time.perf_counter() - start
+    completed = sum(1 for audio_filename in results.values() if audio_filename)
+    print(f"🎉 {completed}/{len(shows)}番組の生成完了 ({elapsed:.1f}秒)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="番組設定に従って複数のポッドキャストを生成")
+    parser.add_argument("--config", default="shows.toml", help="番組設定ファイル（TOML）")
+    parser.add_argument("--show", action="append", help="生成する番組名（複数指定可、省略時は全番組）")
+    parser.add_argument("--workers", type=int, default=0, help="ワーカープロセス数")
+    parser.add_argument("--publish", action="store_true", help="生成後に番組ごとのRSSフィードを更新")
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを使わずに台本・音声を生成")
+    args = parser.parse_args()
+
+    shows = load_shows(args.config)
+    if args.show:
+        shows = [show for show in shows if show["name"] in args.show]
+    if not shows:
+        print("❌ 生成する番組がありません")
+        return
+
+    github_repo = os.environ.get("GITHUB_REPOSITORY", "your-username/ai-podcast-generator")
+    run_shows(
+        shows,
+        max_workers=args.workers or None,
+        publish=args.publish,
+        github_repo=github_repo,
+        use_cache=False if args.no_cache else None,
+    )
+
+
+if __name__ == "__main__":
+    main()
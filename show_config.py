@@ -0,0 +1,83 @@
+import os
+
+
+# 番組ごとに上書きできる設定の既定値（既定の番組は従来のパス・メタ情報のまま）
+DEFAULT_SHOW = {
+    "name": "",
+    "title": "AIニュースポッドキャスト",
+    "description": "毎日最新のAIニュースを自動生成でお届けするポッドキャスト",
+    "episode_title": "AIニュースポッドキャスト - {date}",
+    "language": "ja",
+    "author": "sacra0-0",
+    "email": "sakuraryota1118@gmail.com",
+    "category": "Technology",
+    "copyright": "Copyright 2025 sacra0-0. All rights reserved.",
+    "topic": "",
+    "sources": [],
+    "prompt": "",
+    "voices": {},
+    "image_url": "",
+    "output_dir": "",
+    "docs_dir": "docs",
+    "feed_state_dir": "feed_state",
+    "catalog": "",
+    "schedule": "",
+}
+
+
+def resolve_show(config=None):
+    """
+    番組の設定に既定値を補って返す
+
+    nameを指定した番組は、出力ディレクトリ・Pagesのディレクトリ・フィードのストアを
+    番組ごとに分ける（output/<name>, docs/<name>, feed_state/<name>）。
+    エピソードのカタログも出力ディレクトリに置く。
+    """
+    show = dict(DEFAULT_SHOW)
+    show["voices"] = {}
+    if config:
+        show.update(config)
+        name = config.get("name")
+        if name:
+            if "output_dir" not in config:
+                show["output_dir"] = os.path.join("output", name)
+            if "docs_dir" not in config:
+                show["docs_dir"] = os.path.join("docs", name)
+            if "feed_state_dir" not in config:
+                show["feed_state_dir"] = os.path.join("feed_state", name)
+            if "catalog" not in config:
+                show["catalog"] = os.path.join(show["output_dir"], "episodes.db")
+    return show
+
+
+def feed_state_dir(show):
+    """フィードのストアのディレクトリ（既定の番組は環境変数 FEED_STATE_DIR、既定: feed_state）"""
+    if show["name"]:
+        return show["feed_state_dir"]
+    return os.environ.get("FEED_STATE_DIR", "feed_state")
+
+
+def load_shows(path):
+    """
+    TOMLの番組設定を読み込む
+
+    [defaults] の値を全番組に適用し、[[shows]] ごとの設定で上書きする。
+    """
+    # tomllibはPython 3.11以降のため、番組設定を使うときだけ読み込む
+    import tomllib
+
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+
+    defaults = data.get("defaults", {})
+    shows = []
+    names = set()
+    for entry in data.get("shows", []):
+        config = {**defaults, **entry}
+        if not config.get("name"):
+            raise ValueError("番組にはnameが必要です")
+        if config["name"] in names:
+            raise ValueError(f"番組名が重複しています: {config['name']}")
+        names.add(config["name"])
+        shows.append(resolve_show(config))
+    return shows
@@ -39,6 +39,7 @@ def test_imports():
         ("google.genai", "Google Generative AI"),
         ("requests", "Requests"),
         ("bs4", "BeautifulSoup4"),
+        ("numpy", "NumPy"),
     ]
     
     all_ok = True
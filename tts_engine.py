@@ -0,0 +1,366 @@
+import hashlib
+import json
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from google.genai import types
+
+from gemini_scheduler import PRIORITY_TTS, estimate_tokens
+
+
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+TTS_SAMPLE_RATE = 24000
+
+DEFAULT_VOICES = {
+    "Speaker 1": "Zephyr",
+    "Speaker 2": "Puck",
+}
+
+# 「Speaker 1: 」「**Speaker 1:**」「Speaker 1：」などの話者行
+SPEAKER_LINE_RE = re.compile(r"^[\s*#>\-]*(Speaker)\s*(\d+)\s*\**\s*[:：]\s*\**\s*(.*)$")
+
+# 話者行のない台本を分割する場合の1セグメントの上限（TTS_CHUNK_CHARS未指定時、約1〜2分の音声）
+FALLBACK_SEGMENT_CHARS = 500
+
+# 文末（句点・感嘆符・疑問符の後、ピリオドは後ろに空白がある場合のみ）
+SENTENCE_END_RE = re.compile(r"(?<=[。！？!?])\s*|(?<=\.)\s+")
+
+
+def parse_audio_mime_type(mime_type):
+    """MIMEタイプから音声パラメータを抽出"""
+    bits_per_sample = 16
+    rate = TTS_SAMPLE_RATE
+
+    parts = mime_type.split(";")
+    for param in parts:
+        param = param.strip()
+        if param.lower().startswith("rate="):
+            try:
+                rate = int(param.split("=", 1)[1])
+            except (ValueError, IndexError):
+                pass
+        elif param.startswith("audio/L"):
+            try:
+                bits_per_sample = int(param.split("L", 1)[1])
+            except (ValueError, IndexError):
+                pass
+
+    return {"bits_per_sample": bits_per_sample, "rate": rate}
+
+
+def split_turns(script):
+    """
+    台本を話者ごとのセリフ（ターン）に分割
+
+    戻り値: [(話者, セリフ), ...]
+    話者行に続く話者名のない行は直前のセリフの続きとして扱い、
+    最初の話者行より前の見出しなどは読み上げ対象から除外する。
+    """
+    turns = []
+    for line in script.splitlines():
+        match = SPEAKER_LINE_RE.match(line)
+        if match:
+            speaker = f"{match.group(1)} {match.group(2)}"
+            text = match.group(3).strip().rstrip("*").strip()
+            turns.append([speaker, text])
+        elif turns and line.strip():
+            turns[-1][1] = f"{turns[-1][1]}\n{line.strip()}".strip()
+
+    return [(speaker, text) for speaker, text in turns if text]
+
+
+def split_text(text, max_chars):
+    """
+    テキストを行の境界でmax_chars文字以下のまとまりに分割
+
+    max_charsを超える行は文の境界で、文の区切りがない長い文はmax_chars文字ごとに区切る。
+    """
+    pieces = []
+    for line in text.splitlines():
+        line = line.strip()
+        if len(line) <= max_chars:
+            if line:
+                pieces.append(line)
+            continue
+        for sentence in SENTENCE_END_RE.split(line):
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TTSEngine:
+    """
+    台本をセリフ単位で音声合成し、セグメントごとのPCMをキャッシュするエンジン
+
+    キャッシュキーはセリフ・声・モデル・サンプルレートのハッシュ。
+    台本の一部だけを修正した場合や途中で失敗した後の再実行では、
+    変更・未生成のセリフだけを合成し直す。
+
+    max_chunk_charsを指定すると、連続するセリフをその文字数までまとめて
+    1セグメントとし（セリフの途中では分割しない）、concurrencyの上限まで
+    セグメントを並列に合成して台本の順に連結する。
+
+    checkpointには実行ごとのチェックポイント用キャッシュを設定でき、
+    use_cacheに関係なく受信済みのセグメントを保存・再利用する（--resume用）。
+
+    schedulerを指定すると、合成リクエストはレート制限・再試行付きで送信する。
+    合成したセグメント数・使用トークン数はstatsに累計する。
+    """
+
+    def __init__(self, client, cache=None, model=TTS_MODEL, voices=None,
+                 sample_rate=TTS_SAMPLE_RATE, use_cache=True,
+                 max_chunk_chars=0, concurrency=1, scheduler=None):
+        self.client = client
+        self.scheduler = scheduler
+        self.cache = cache
+        self.model = model
+        self.voices = voices or dict(DEFAULT_VOICES)
+        self.sample_rate = sample_rate
+        self.use_cache = use_cache
+        self.max_chunk_chars = max_chunk_chars
+        self.concurrency = max(1, concurrency)
+        self.checkpoint = None
+        self.stats = {"segments": 0, "cached_segments": 0, "prompt_tokens": 0, "response_tokens": 0}
+        self._stats_lock = threading.Lock()
+
+    def reset_stats(self):
+        """累計したセグメント数・使用トークン数を0に戻す（同じインスタンスで繰り返し生成する場合）"""
+        with self._stats_lock:
+            for name in self.stats:
+                self.stats[name] = 0
+
+    def build_segments(self, script):
+        """台本を合成単位（セグメント）に分割"""
+        turns = split_turns(script)
+        if not turns:
+            # 話者行が見つからない場合は台本を行・文の境界で区切って合成
+            # （セグメントの音声は受信し終えるまでメモリに保持するため、台本全体を1セグメントにしない）
+            limit = self.max_chunk_chars if self.max_chunk_chars > 0 else FALLBACK_SEGMENT_CHARS
+            if len(script) <= limit:
+                return [[(None, script)]]
+            return [[(None, text)] for text in split_text(script, limit)]
+
+        if self.max_chunk_chars <= 0:
+            return [[turn] for turn in turns]
+
+        # ターン境界でmax_chunk_charsを超えない範囲にまとめる
+        segments = []
+        current = []
+        current_chars = 0
+        for turn in turns:
+            turn_chars = len(turn[1])
+            if current and current_chars + turn_chars > self.max_chunk_chars:
+                segments.append(current)
+                current = []
+                current_chars = 0
+            current.append(turn)
+            current_chars += turn_chars
+        if current:
+            segments.append(current)
+        return segments
+
+    def segment_key(self, segment):
+        """セグメントのキャッシュキー（セリフ・声・モデル・サンプルレート）"""
+        payload = json.dumps(
+            {
+                "turns": [[self.voices.get(speaker, speaker), text] for speaker, text in segment],
+                "model": self.model,
+                "rate": self.sample_rate,
+            },
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _voice_config(self, voice_name):
+        return types.VoiceConfig(
+            prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voice_name)
+        )
+
+    def build_request(self, segment):
+        """セグメントの合成リクエスト（contents, config）を作成"""
+        speakers = {speaker for speaker, _ in segment}
+
+        if len(speakers) == 1 and next(iter(speakers)) in self.voices:
+            # 1人の話者のみ: 単一話者の音声設定
+            speaker = next(iter(speakers))
+            text = "\n".join(text for _, text in segment)
+            prompt = f"以下のセリフを自然な会話調で読み上げてください:\n\n{text}"
+            speech_config = types.SpeechConfig(voice_config=self._voice_config(self.voices[speaker]))
+        else:
+            text = "\n".join(
+                f"{speaker}: {text}" if speaker else text for speaker, text in segment
+            )
+            prompt = f"以下の台本を自然な会話調で読み上げてください:\n\n{text}"
+            speech_config = types.SpeechConfig(
+                multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                    speaker_voice_configs=[
+                        types.SpeakerVoiceConfig(
+                            speaker=speaker,
+                            voice_config=self._voice_config(voice_name),
+                        )
+                        for speaker, voice_name in self.voices.items()
+                    ]
+                ),
+            )
+
+        contents = [
+            types.Content(
+                role="user",
+                parts=[types.Part.from_text(text=prompt)],
+            ),
+        ]
+        config = types.GenerateContentConfig(
+            temperature=1,
+            response_modalities=["audio"],
+            speech_config=speech_config,
+        )
+        return contents, config
+
+    def synthesize_segment(self, segment):
+        """1セグメントを合成し、(音声データ, MIMEタイプ)を返す"""
+        contents, config = self.build_request(segment)
+        if self.scheduler is None:
+            return self._stream_audio(contents, config)
+        # ストリームの途中で失敗した場合もセグメント単位で再試行する
+        return self.scheduler.call(
+            self.model,
+            lambda: self._stream_audio(contents, config),
+            priority=PRIORITY_TTS,
+            estimated_tokens=estimate_tokens("".join(text for _, text in segment)),
+        )
+
+    def _stream_audio(self, contents, config):
+        """合成リクエストを送信し、ストリームで受信した音声を連結"""
+        chunks = []
+        mime_type = None
+        usage = None
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model,
+            contents=contents,
+            config=config,
+        ):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if (chunk.candidates and
+                chunk.candidates[0].content and
+                chunk.candidates[0].content.parts):
+
+                part = chunk.candidates[0].content.parts[0]
+                if part.inline_data and part.inline_data.data:
+                    chunks.append(part.inline_data.data)
+                    if mime_type is None:
+                        mime_type = part.inline_data.mime_type
+
+        # 使用トークン数はストリームの最後のusage_metadataに累計される
+        if usage:
+            with self._stats_lock:
+                self.stats["prompt_tokens"] += usage.prompt_token_count or 0
+                self.stats["response_tokens"] += usage.candidates_token_count or 0
+        return b"".join(chunks), mime_type
+
+    def load_or_synthesize(self, segment):
+        """キャッシュにあれば再利用し、なければ合成してキャッシュに保存"""
+        key = self.segment_key(segment)
+        mime_type = f"audio/L16;codec=pcm;rate={self.sample_rate}"
+        if self.checkpoint:
+            pcm = self.checkpoint.get_bytes(key)
+            if pcm is not None:
+                return pcm, mime_type, True
+        if self.cache and self.use_cache:
+            pcm = self.cache.get_bytes(key)
+            if pcm is not None:
+                return pcm, mime_type, True
+
+        audio_data, mime_type = self.synthesize_segment(segment)
+
+        # 想定どおりのPCM形式のときだけキャッシュ
+        if audio_data and mime_type and "audio/L" in mime_type:
+            parameters = parse_audio_mime_type(mime_type)
+            if parameters["bits_per_sample"] == 16 and parameters["rate"] == self.sample_rate:
+                for cache in (self.cache, self.checkpoint):
+                    if cache:
+                        cache.set_bytes(key, audio_data)
+
+        return audio_data, mime_type, False
+
+    def _convert_rate(self, audio_data, mime_type, target_rate):
+        """
+        セグメントのサンプルレートが異なる場合は出力レートに変換
+
+        16bitのPCMをint16のビューのまま線形補間する（Python 3.13で削除されたaudioopの代わり）。
+        """
+        parameters = parse_audio_mime_type(mime_type)
+        if parameters["rate"] == target_rate:
+            return audio_data
+
+        print(f"⚠️ サンプルレートを変換: {parameters['rate']} → {target_rate}")
+        # レートの変換はまれなため、numpyは必要になったときだけ読み込む
+        import numpy as np
+
+        samples = np.frombuffer(audio_data, dtype="<i2", count=len(audio_data) // 2)
+        if not len(samples):
+            return b""
+        count = len(samples) * target_rate // parameters["rate"]
+        positions = np.arange(count) * (parameters["rate"] / target_rate)
+        converted = np.interp(positions, np.arange(len(samples)), samples)
+        return np.rint(converted).astype("<i2").tobytes()
+
+    def iter_audio(self, script):
+        """
+        台本全体を合成し、(音声データ, MIMEタイプ)を台本の順に返すジェネレータ
+
+        セグメントはconcurrencyの上限まで並列に合成する。先読みは
+        concurrencyの2倍までに抑え、保持する音声データ量を一定に保つ。
+        各セグメントのMIMEタイプのサンプルレートを確認し、
+        最初のセグメントと異なる場合はそのレートに揃える。
+        """
+        segments = self.build_segments(script)
+        window = self.concurrency * 2
+
+        mime_type = None
+        output_rate = None
+        cached_count = 0
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(segments))) as executor:
+            pending = deque()
+            remaining = iter(segments)
+            try:
+                for segment in islice(remaining, window):
+                    pending.append(executor.submit(self.load_or_synthesize, segment))
+
+                while pending:
+                    audio_data, segment_mime, cached = pending.popleft().result()
+                    for segment in islice(remaining, 1):
+                        pending.append(executor.submit(self.load_or_synthesize, segment))
+
+                    if not audio_data:
+                        raise RuntimeError("音声データを受信できませんでした")
+
+                    if segment_mime and "audio/L" in segment_mime:
+                        rate = parse_audio_mime_type(segment_mime)["rate"]
+                        if output_rate is None:
+                            output_rate = rate
+                        audio_data = self._convert_rate(audio_data, segment_mime, output_rate)
+
+                    mime_type = mime_type or segment_mime
+                    cached_count += cached
+                    with self._stats_lock:
+                        self.stats["segments"] += 1
+                        self.stats["cached_segments"] += cached
+                    yield audio_data, mime_type
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        print(f"🔁 キャッシュ済みセグメント: {cached_count}/{len(segments)}")
@@ -1,46 +1,117 @@
 import os
+import re
+import json
 import glob
-import shutil
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from xml.etree import ElementTree as ET
 
+from audio_encoder import AUDIO_EXTENSIONS, audio_mime_type
+from audio_metadata import format_duration, get_audio_duration
+from audio_store import AudioStore
+from episode_catalog import open_catalog
+from feed_writer import FeedStore, indent_xml
+from news_dedup import StoryIndex, news_path
+from retention import RetentionPolicy, audio_filename
+from run_metrics import RunMetrics
+from show_config import feed_state_dir, resolve_show
+
 # iTunes名前空間を登録
 ET.register_namespace('itunes', 'http://www.itunes.com/dtds/podcast-1.0.dtd')
 ET.register_namespace('content', 'http://purl.org/rss/1.0/modules/content/')
 
 
 class RSSUpdater:
-    def __init__(self, github_repo):
+    def __init__(self, github_repo, show=None):
         """
         github_repo: "username/repo-name" の形式
+        show: 番組の設定（show_config参照）。省略時は既定のAIニュース番組
         """
         self.github_repo = github_repo
-        self.rss_file = "docs/podcast_feed.xml"
-        self.audio_dir = "docs/audio"
+        self.show = resolve_show(show)
+        self.docs_dir = self.show["docs_dir"]
+        self.rss_file = os.path.join(self.docs_dir, "podcast_feed.xml")
+        self.audio_dir = os.path.join(self.docs_dir, "audio")
+        self.archive_dir = os.path.join(self.docs_dir, "archive")
+        self.site_url = f"https://{github_repo.split('/')[0]}.github.io/{github_repo.split('/')[1]}/"
+        # 番組ごとのdocs/<name>はPages上の<name>/に公開される
+        site_path = os.path.relpath(self.docs_dir, "docs").replace(os.sep, "/")
+        pages_url = self.site_url if site_path == "." else f"{self.site_url}{site_path}/"
+        self.pages_url = pages_url
+        state_dir = feed_state_dir(self.show)
+
+        # 差分更新用のシリアライズ済みフィード（リポジトリにコミットする）
+        # メインのフィードは最新FEED_MAX_ITEMS件に制限し、古いエピソードはアーカイブページへ
+        self.feed_store = FeedStore(
+            state_dir,
+            max_items=int(os.environ.get("FEED_MAX_ITEMS", "100")),
+            page_size=int(os.environ.get("FEED_ARCHIVE_PAGE_SIZE", "50")),
+            archive_dir=self.archive_dir,
+            feed_url=pages_url + os.path.basename(self.rss_file),
+            archive_base_url=pages_url + "archive/",
+        )
 
         # docsディレクトリが存在しない場合は作成
-        os.makedirs("docs", exist_ok=True)
+        os.makedirs(self.docs_dir, exist_ok=True)
         os.makedirs(self.audio_dir, exist_ok=True)
+        # 音声は内容のハッシュ名で配置する（同じ内容なら再配置しない）
+        self.audio_store = AudioStore(self.audio_dir)
+        # 公開済みエピソードの保持ポリシー（日数・件数・合計サイズ）
+        self.retention = RetentionPolicy.from_env()
+        self.metrics = RunMetrics(
+            "publish_feed", labels={"show": self.show["name"]} if self.show["name"] else None
+        )
     
-    def get_latest_audio_file(self):
-        """最新の音声ファイルを取得"""
-        audio_files = glob.glob("podcast_*.wav")
+    def get_latest_episode(self):
+        """
+        RSS未公開の最新エピソードをカタログから取得
+
+        カタログにエピソードが1件もない場合（手動で置いたファイルなど）は
+        従来どおりファイルを走査して最新のものを使う。
+        """
+        catalog = open_catalog(self.show["catalog"] or None)
+        try:
+            if catalog.count():
+                episode = catalog.latest_unpublished("rss")
+                if not episode:
+                    print("⚠️ 未公開のエピソードがありません")
+                    return None
+                print(f"📁 最新音声: {episode['audio_path']}")
+                return episode
+        finally:
+            catalog.close()
+
+        audio_files = [
+            path for ext in AUDIO_EXTENSIONS for path in glob.glob(f"podcast_*{ext}")
+        ]
         if not audio_files:
             print("⚠️ 音声ファイルが見つかりません")
             return None
         
         latest_audio = max(audio_files, key=os.path.getctime)
         print(f"📁 最新音声: {latest_audio}")
-        return latest_audio
+
+        script_files = glob.glob("script_*.txt")
+        latest_script = max(script_files, key=os.path.getctime) if script_files else None
+        return {
+            "id": None,
+            "audio_path": latest_audio,
+            "script_path": latest_script,
+            "size": os.path.getsize(latest_audio),
+            "duration": None,
+        }
+
+    def get_latest_audio_file(self):
+        """最新の音声ファイルを取得"""
+        episode = self.get_latest_episode()
+        return episode["audio_path"] if episode else None
     
     def get_latest_script_file(self):
         """最新の台本ファイルを取得"""
-        script_files = glob.glob("script_*.txt")
-        if not script_files:
-            return None
-        
-        latest_script = max(script_files, key=os.path.getctime)
-        return latest_script
+        episode = self.get_latest_episode()
+        return episode["script_path"] if episode else None
     
     def read_script_summary(self, script_file):
         """台本から概要を抽出（最初の200文字）"""
@@ -59,73 +130,78 @@ class RSSUpdater:
             print(f"⚠️ 台本読み込みエラー: {e}")
             return "今日の最新AIニュースをお届けします"
 
-    def copy_audio_to_docs(self, audio_file):
-        """音声ファイルをdocs/audioフォルダにコピー"""
+    def copy_audio_to_docs(self, audio_file, content_hash=None):
+        """
+        音声ファイルをdocs/audioフォルダに内容のハッシュ名で配置
+
+        同じ内容のファイルが配置済みならコピーを省略し、可能ならハードリンク・
+        reflinkで配置する。配置したファイル名を返す。
+        """
         if not os.path.exists(audio_file):
             print(f"❌ 音声ファイルが見つかりません: {audio_file}")
             return None
 
         try:
-            audio_filename = os.path.basename(audio_file)
-            destination = os.path.join(self.audio_dir, audio_filename)
+            start = time.perf_counter()
+            audio_filename, method = self.audio_store.store(audio_file, content_hash)
+            destination = self.audio_store.path_for(audio_filename)
+            elapsed = time.perf_counter() - start
 
-            # ファイルをコピー
-            shutil.copy2(audio_file, destination)
-            print(f"✅ 音声ファイルをコピー: {destination}")
+            if method == "existing":
+                print(f"♻️ 同じ内容の音声ファイルが配置済み: {destination}")
+            else:
+                print(f"✅ 音声ファイルを配置 ({method}, {elapsed:.2f}秒): {destination}")
 
             return audio_filename
         except Exception as e:
             print(f"❌ ファイルコピーエラー: {e}")
             return None
     
-    def update_rss(self):
-        """RSSフィードを更新"""
-        print("=" * 50)
-        print("📡 RSSフィード更新")
-        print("=" * 50)
+    def get_unpublished_episodes(self):
+        """
+        RSS未公開のエピソードをカタログから古い順に取得
 
-        # 最新の音声ファイルを取得
-        latest_audio = self.get_latest_audio_file()
-        if not latest_audio:
-            print("❌ 更新する音声ファイルがありません")
-            return False
+        カタログにエピソードが1件もない場合は、ファイルを走査した最新のエピソードのみ。
+        """
+        catalog = open_catalog(self.show["catalog"] or None)
+        try:
+            if catalog.count():
+                episodes = catalog.unpublished("rss")
+                if not episodes:
+                    print("⚠️ 未公開のエピソードがありません")
+                return episodes
+        finally:
+            catalog.close()
+
+        episode = self.get_latest_episode()
+        return [episode] if episode else []
+
+    def create_item(self, episode):
+        """
+        エピソードの音声をdocs/audioに配置し、フィードの<item>要素を作成
+
+        日付とGUIDはエピソードの作成日時（カタログにない場合は現在時刻）から作る。
+        音声を配置できなかった場合はNoneを返す。
+        """
+        audio_file = episode["audio_path"]
+        created = datetime.fromisoformat(episode["created_at"]) if episode.get("created_at") else datetime.now()
 
         # 音声ファイルをdocs/audioにコピー
-        audio_filename = self.copy_audio_to_docs(latest_audio)
+        with self.metrics.stage("copy_audio"):
+            audio_filename = self.copy_audio_to_docs(audio_file, episode.get("content_hash"))
         if not audio_filename:
             print("❌ 音声ファイルのコピーに失敗しました")
-            return False
-
-        # 最新の台本を取得
-        latest_script = self.get_latest_script_file()
-        description = self.read_script_summary(latest_script)
-        
-        # RSSフィードを読み込むか新規作成
-        if os.path.exists(self.rss_file):
-            try:
-                tree = ET.parse(self.rss_file)
-                root = tree.getroot()
-                print("✅ 既存のRSSを読み込み")
-                # 既存のRSSに不足している情報を追加
-                self.ensure_required_fields(root)
-            except ET.ParseError as e:
-                print(f"⚠️ 既存RSSの解析エラー: {e}")
-                print("🔄 新しいRSSフィードを作成します")
-                root = self.create_base_rss()
-                tree = ET.ElementTree(root)
-        else:
-            root = self.create_base_rss()
-            tree = ET.ElementTree(root)
-            print("✅ 新規RSSを作成")
+            return None
 
-        channel = root.find("channel")
+        # エピソードの台本から概要を作成
+        description = self.read_script_summary(episode["script_path"])
         
-        # 新しいエピソードを追加
-        item = ET.SubElement(channel, "item")
+        # 新しいエピソードを作成
+        item = ET.Element("item")
         
         # タイトル
         title = ET.SubElement(item, "title")
-        title.text = f"AIニュースポッドキャスト - {datetime.now().strftime('%Y年%m月%d日')}"
+        title.text = self.show["episode_title"].format(date=created.strftime('%Y年%m月%d日'))
         
         # 説明
         desc = ET.SubElement(item, "description")
@@ -133,88 +209,322 @@ class RSSUpdater:
         
         # 公開日時
         pub_date = ET.SubElement(item, "pubDate")
-        pub_date.text = datetime.now().strftime("%a, %d %b %Y %H:%M:%S +0000")
+        pub_date.text = created.strftime("%a, %d %b %Y %H:%M:%S +0000")
         
         # 音声ファイルのURL（GitHub Pagesを使用）
-        username = self.github_repo.split('/')[0]
-        repo_name = self.github_repo.split('/')[1]
-        audio_url = f"https://{username}.github.io/{repo_name}/audio/{audio_filename}"
+        audio_url = f"{self.pages_url}audio/{audio_filename}"
         
         enclosure = ET.SubElement(item, "enclosure")
         enclosure.set("url", audio_url)
-        enclosure.set("type", "audio/wav")
+        enclosure.set("type", audio_mime_type(audio_filename))
         
         # ファイルサイズ
-        file_size = os.path.getsize(latest_audio)
+        file_size = episode["size"] or os.path.getsize(audio_file)
         enclosure.set("length", str(file_size))
         
         # GUID（一意のID）
         guid = ET.SubElement(item, "guid")
         guid.set("isPermaLink", "false")
-        guid.text = f"{self.github_repo}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        guid.text = f"{self.github_repo}-{created.strftime('%Y%m%d%H%M%S')}"
         
-        # 再生時間（オプション）
-        duration = ET.SubElement(item, "{http://www.itunes.com/dtds/podcast-1.0.dtd}duration")
-        # 仮の再生時間（実際の長さを計算する場合は別途処理が必要）
-        duration.text = "05:00"
-        
-        # XMLを整形して保存
-        self.indent(root)
-        tree.write(self.rss_file, encoding="utf-8", xml_declaration=True)
+        # 再生時間（カタログになければ音声ファイルのヘッダーから計算）
+        seconds = episode["duration"]
+        if seconds is None:
+            seconds = get_audio_duration(audio_file)
+        if seconds is not None:
+            duration = ET.SubElement(item, "{http://www.itunes.com/dtds/podcast-1.0.dtd}duration")
+            duration.text = format_duration(seconds)
+        else:
+            print("⚠️ 再生時間を取得できませんでした")
+        return item
+
+    def update_rss(self):
+        """
+        RSS未公開のエピソードを古い順に全てフィードに追加
+
+        音声を配置できないエピソードがあれば、公開順を保つためそこで止める
+        （それまでのエピソードは公開する）。全て公開できた場合のみTrueを返す。
+        """
+        print("=" * 50)
+        print("📡 RSSフィード更新")
+        print("=" * 50)
+
+        episodes = self.get_unpublished_episodes()
+        if not episodes:
+            print("❌ 更新する音声ファイルがありません")
+            return False
+
+        # 差分更新用のストアがなければ既存のRSSから作成
+        if not self.feed_store.exists():
+            self.bootstrap_feed_store()
+
+        published = []
+        audio_bytes = 0
+        for episode in episodes:
+            print(f"📁 公開する音声: {episode['audio_path']}")
+            item = self.create_item(episode)
+            if item is None:
+                break
+            # エピソードの断片を追記
+            with self.metrics.stage("feed"):
+                self.feed_store.append_item(item)
+            published.append((episode, item.find("guid").text))
+            audio_bytes += int(item.find("enclosure").get("length"))
+        if not published:
+            return False
+
+        # フィード全体をストリーミングで書き出す
+        with self.metrics.stage("feed"):
+            pruned, reclaimed = self.apply_retention()
+            episode_count = self.feed_store.write_feed(self.rss_file)
+        self.metrics.set("audio_bytes", audio_bytes)
+        self.metrics.set("published_episodes", len(published))
+        self.metrics.set("feed_episodes", episode_count)
+        self.metrics.set("feed_bytes", os.path.getsize(self.rss_file))
+        self.metrics.set("pruned_episodes", pruned)
+        self.metrics.set("reclaimed_bytes", reclaimed)
+
+        # カタログに公開済みとして記録
+        catalog = open_catalog(self.show["catalog"] or None)
+        try:
+            for episode, guid in published:
+                if episode["id"] is not None:
+                    catalog.mark_published(episode["id"], "rss", guid=guid)
+                self.record_stories(episode["script_path"])
+        finally:
+            catalog.close()
         
-        print(f"✅ RSSフィード更新完了: {self.rss_file}")
-        print(f"📊 ファイルサイズ: {file_size / 1024 / 1024:.2f} MB")
+        print(f"✅ RSSフィード更新完了: {self.rss_file} ({len(published)}件追加, {episode_count}エピソード)")
+        print(f"📊 ファイルサイズ: {audio_bytes / 1024 / 1024:.2f} MB")
         print("=" * 50)
         
-        return True
+        return len(published) == len(episodes)
     
+    def record_stories(self, script_path):
+        """
+        公開したエピソードのニュースを放送履歴に登録
+
+        履歴はフィードのストアと同じディレクトリに置き、フィードと一緒にコミットする。
+        公開（push）に失敗した場合は履歴も残らないため、再実行で同じニュースを選び直せる。
+        """
+        path = news_path(script_path) if script_path else None
+        if not path or not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            news_items = json.load(f)
+        story_index = StoryIndex(
+            os.path.join(self.feed_store.state_dir, "story_index.json"),
+            retention_days=int(os.environ.get("STORY_HISTORY_DAYS", "30")),
+        )
+        story_index.add(news_items)
+        story_index.save()
+        print(f"📝 放送履歴に{len(news_items)}件のニュースを登録")
+
+    def apply_retention(self):
+        """
+        保持ポリシーを超えたエピソードをフィードとdocs/audioから削除
+
+        期限切れのエピソードはストアの先頭位置を進めて読み飛ばし（断片は書き直さない）、
+        残るエピソードから参照されなくなった音声ファイルを削除する。
+        削除したエピソード数と回収したバイト数を返す。
+        """
+        if not self.retention.is_enabled() or not self.feed_store.exists():
+            return 0, 0
+
+        entries = self.feed_store.read_entries()
+        file_sizes = {}
+        for entry in entries:
+            name = audio_filename(entry)
+            path = os.path.join(self.audio_dir, name)
+            if name and name not in file_sizes and os.path.isfile(path):
+                file_sizes[name] = os.path.getsize(path)
+
+        # ストアからは古い順にしか削除しないため、先頭から続く期限切れのエピソードのみ削除する
+        # （公開日時の順序が前後している場合、途中のエピソードは先頭が期限切れになるまで残す）
+        expired_set = set(self.retention.select_expired(entries, file_sizes))
+        expired = 0
+        while expired in expired_set:
+            expired += 1
+        if not expired:
+            return 0, 0
+
+        self.feed_store.expire_head(expired)
+
+        kept_files = {audio_filename(entry) for entry in entries[expired:]}
+        reclaimed = 0
+        for name in {audio_filename(entry) for entry in entries[:expired]}:
+            if name in kept_files or name not in file_sizes:
+                continue
+            os.remove(os.path.join(self.audio_dir, name))
+            reclaimed += file_sizes[name]
+
+        remaining = sum(size for name, size in file_sizes.items() if name in kept_files)
+        print(f"🧹 保持ポリシーにより{expired}エピソードを削除 "
+              f"(回収 {reclaimed / 1024 / 1024:.2f} MB, 残り {remaining / 1024 / 1024:.2f} MB)")
+        return expired, reclaimed
+
+    def prune(self):
+        """保持ポリシーを適用してフィードを書き出す"""
+        if not self.retention.is_enabled():
+            print("⚠️ 保持ポリシーが設定されていません")
+            return False
+        if not self.feed_store.exists():
+            self.bootstrap_feed_store()
+        self.apply_retention()
+        self.feed_store.write_feed(self.rss_file)
+        return True
+
+    def bootstrap_feed_store(self):
+        """既存のRSS（なければ新規のRSS）から差分更新用のストアを作成"""
+        if os.path.exists(self.rss_file):
+            try:
+                root = self.parse_feed_file(self.rss_file).getroot()
+                print("✅ 既存のRSSを読み込み")
+                # 既存のRSSに不足している情報を追加
+                self.ensure_required_fields(root)
+            except ET.ParseError as e:
+                print(f"⚠️ 既存RSSの解析エラー: {e}")
+                print("🔄 新しいRSSフィードを作成します")
+                root = self.create_base_rss()
+        else:
+            root = self.create_base_rss()
+            print("✅ 新規RSSを作成")
+
+        self.feed_store.rebuild(root)
+
+    def backfill_durations(self, max_workers=8):
+        """既存の全エピソードの再生時間とファイルサイズを音声ファイルのヘッダーから修正"""
+        print("=" * 50)
+        print("⏱️ 再生時間のバックフィル")
+        print("=" * 50)
+
+        # アーカイブ済みのエピソードも含めて修正するため、ストアから全エピソードを読み込む
+        if self.feed_store.exists():
+            root = self.feed_store.load_root()
+        elif os.path.exists(self.rss_file):
+            root = self.parse_feed_file(self.rss_file).getroot()
+        else:
+            print(f"❌ RSSフィードが見つかりません: {self.rss_file}")
+            return False
+
+        channel = root.find("channel")
+        itunes_ns = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+
+        targets = []
+        for item in channel.findall("item"):
+            enclosure = item.find("enclosure")
+            if enclosure is None or not enclosure.get("url"):
+                continue
+            local_path = os.path.join(self.audio_dir, os.path.basename(enclosure.get("url")))
+            targets.append((item, enclosure, local_path))
+
+        def read_header(path):
+            if not os.path.exists(path):
+                return None, None
+            return get_audio_duration(path), os.path.getsize(path)
+
+        # 全エピソードのヘッダーを並列に読み込む
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(read_header, [path for _, _, path in targets]))
+
+        updated = 0
+        for (item, enclosure, path), (seconds, size) in zip(targets, results):
+            if seconds is None:
+                print(f"⚠️ 再生時間を取得できません: {path}")
+                continue
+
+            enclosure.set("length", str(size))
+            duration = item.find(f"{itunes_ns}duration")
+            if duration is None:
+                duration = ET.SubElement(item, f"{itunes_ns}duration")
+            duration.text = format_duration(seconds)
+            updated += 1
+
+        # ストアを作り直してフィードを書き出す
+        self.feed_store.rebuild(root)
+        self.feed_store.write_feed(self.rss_file)
+
+        print(f"✅ {updated}/{len(targets)}件のエピソードを更新")
+        print("=" * 50)
+        return True
+
+    def parse_feed_file(self, path):
+        """
+        RSSファイルを読み込む
+
+        以前のバージョンで出力された、ルート要素にxmlns:itunesが重複したフィードは
+        重複を取り除いてから読み込む。
+        """
+        try:
+            return ET.parse(path)
+        except ET.ParseError:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            rss_start = re.search(r"<rss\b[^>]*>", content)
+            if not rss_start:
+                raise
+
+            seen = set()
+
+            def dedupe(match):
+                if match.group(1) in seen:
+                    return ""
+                seen.add(match.group(1))
+                return match.group(0)
+
+            fixed_tag = re.sub(r'\s+(xmlns:\w+)="[^"]*"', dedupe, rss_start.group(0))
+            content = content[:rss_start.start()] + fixed_tag + content[rss_start.end():]
+            return ET.ElementTree(ET.fromstring(content))
+
     def create_base_rss(self):
         """基本的なRSSフィード構造を作成"""
         itunes_ns = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+        show = self.show
+        cover_url = show["image_url"] or f"{self.site_url}podcast-cover.png"
 
         rss = ET.Element("rss")
         rss.set("version", "2.0")
-        rss.set("xmlns:itunes", "http://www.itunes.com/dtds/podcast-1.0.dtd")
+        # xmlns:itunes はitunes要素の出力時にElementTreeが自動で宣言する
         rss.set("xmlns:content", "http://purl.org/rss/1.0/modules/content/")
 
         channel = ET.SubElement(rss, "channel")
 
         # ポッドキャストのメタ情報
         title = ET.SubElement(channel, "title")
-        title.text = "AIニュースポッドキャスト"
+        title.text = show["title"]
 
         description = ET.SubElement(channel, "description")
-        description.text = "毎日最新のAIニュースを自動生成でお届けするポッドキャスト"
+        description.text = show["description"]
 
         link = ET.SubElement(channel, "link")
         link.text = f"https://github.com/{self.github_repo}"
 
         language = ET.SubElement(channel, "language")
-        language.text = "ja"
+        language.text = show["language"]
 
         # メールアドレス（必須）
         managing_editor = ET.SubElement(channel, "managingEditor")
-        managing_editor.text = "sakuraryota1118@gmail.com (AI Podcast Generator)"
+        managing_editor.text = f"{show['email']} (AI Podcast Generator)"
 
         # カバーアート（必須）
         image = ET.SubElement(channel, "image")
         image_url = ET.SubElement(image, "url")
-        image_url.text = f"https://{self.github_repo.split('/')[0]}.github.io/{self.github_repo.split('/')[1]}/podcast-cover.png"
+        image_url.text = cover_url
         image_title = ET.SubElement(image, "title")
-        image_title.text = "AIニュースポッドキャスト"
+        image_title.text = show["title"]
         image_link = ET.SubElement(image, "link")
         image_link.text = f"https://github.com/{self.github_repo}"
 
         # iTunes用のカバーアート
         itunes_image = ET.SubElement(channel, f"{itunes_ns}image")
-        itunes_image.set("href", f"https://{self.github_repo.split('/')[0]}.github.io/{self.github_repo.split('/')[1]}/podcast-cover.png")
+        itunes_image.set("href", cover_url)
 
         # iTunes固有のタグ
         itunes_author = ET.SubElement(channel, f"{itunes_ns}author")
-        itunes_author.text = "sacra0-0"
+        itunes_author.text = show["author"]
 
         itunes_category = ET.SubElement(channel, f"{itunes_ns}category")
-        itunes_category.set("text", "Technology")
+        itunes_category.set("text", show["category"])
 
         itunes_explicit = ET.SubElement(channel, f"{itunes_ns}explicit")
         itunes_explicit.text = "false"
@@ -222,17 +532,17 @@ class RSSUpdater:
         # オーナー情報（Spotify for Podcastersで必要）
         itunes_owner = ET.SubElement(channel, f"{itunes_ns}owner")
         itunes_owner_name = ET.SubElement(itunes_owner, f"{itunes_ns}name")
-        itunes_owner_name.text = "sacra0-0"
+        itunes_owner_name.text = show["author"]
         itunes_owner_email = ET.SubElement(itunes_owner, f"{itunes_ns}email")
-        itunes_owner_email.text = "sakuraryota1118@gmail.com"
+        itunes_owner_email.text = show["email"]
         
         # 著作権情報
         copyright_elem = ET.SubElement(channel, "copyright")
-        copyright_elem.text = "Copyright 2025 sacra0-0. All rights reserved."
+        copyright_elem.text = show["copyright"]
         
         # ウェブマスター
         webmaster = ET.SubElement(channel, "webMaster")
-        webmaster.text = "sakuraryota1118@gmail.com (sacra0-0)"
+        webmaster.text = f"{show['email']} ({show['author']})"
         
         return rss
     
@@ -245,50 +555,45 @@ class RSSUpdater:
         if channel.find(f"{itunes_ns}owner") is None:
             itunes_owner = ET.SubElement(channel, f"{itunes_ns}owner")
             itunes_owner_name = ET.SubElement(itunes_owner, f"{itunes_ns}name")
-            itunes_owner_name.text = "sacra0-0"
+            itunes_owner_name.text = self.show["author"]
             itunes_owner_email = ET.SubElement(itunes_owner, f"{itunes_ns}email")
-            itunes_owner_email.text = "sakuraryota1118@gmail.com"
+            itunes_owner_email.text = self.show["email"]
             print("✅ iTunes owner情報を追加")
 
         # 著作権情報を確認・追加
         if channel.find("copyright") is None:
             copyright_elem = ET.SubElement(channel, "copyright")
-            copyright_elem.text = "Copyright 2025 sacra0-0. All rights reserved."
+            copyright_elem.text = self.show["copyright"]
             print("✅ 著作権情報を追加")
 
         # ウェブマスター情報を確認・追加
         if channel.find("webMaster") is None:
             webmaster = ET.SubElement(channel, "webMaster")
-            webmaster.text = "sakuraryota1118@gmail.com (sacra0-0)"
+            webmaster.text = f"{self.show['email']} ({self.show['author']})"
             print("✅ ウェブマスター情報を追加")
 
         # iTunes author情報を更新
         itunes_author = channel.find(f"{itunes_ns}author")
         if itunes_author is not None:
-            itunes_author.text = "sacra0-0"
+            itunes_author.text = self.show["author"]
         else:
             itunes_author = ET.SubElement(channel, f"{itunes_ns}author")
-            itunes_author.text = "sacra0-0"
+            itunes_author.text = self.show["author"]
             print("✅ iTunes author情報を追加")
     
     def indent(self, elem, level=0):
         """XMLを見やすく整形"""
-        i = "\n" + level * "  "
-        if len(elem):
-            if not elem.text or not elem.text.strip():
-                elem.text = i + "  "
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-            for child in elem:
-                self.indent(child, level + 1)
-            if not child.tail or not child.tail.strip():
-                child.tail = i
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
+        indent_xml(elem, level)
 
+def main(argv=None):
+    """RSSフィードを更新し、成否を返す"""
+    parser = argparse.ArgumentParser(description="RSSフィード更新")
+    parser.add_argument("--backfill-durations", action="store_true",
+                        help="既存エピソードの再生時間とファイルサイズを修正")
+    parser.add_argument("--prune", action="store_true",
+                        help="保持ポリシーを超えたエピソードと音声ファイルを削除")
+    args = parser.parse_args(argv)
 
-def main():
     # 環境変数からリポジトリ名を取得
     github_repo = os.environ.get("GITHUB_REPOSITORY")
     
@@ -298,13 +603,25 @@ def main():
         github_repo = "your-username/ai-podcast-generator"
     
     updater = RSSUpdater(github_repo)
-    success = updater.update_rss()
+    if args.backfill_durations:
+        updater.backfill_durations()
+        return True
+    if args.prune:
+        updater.prune()
+        return True
+
+    success = False
+    try:
+        success = updater.update_rss()
+    finally:
+        updater.metrics.finish("success" if success else "failed")
     
     if success:
         print("\n🎉 RSS更新完了！")
         print(f"📡 フィードURL: https://{github_repo.split('/')[0]}.github.io/{github_repo.split('/')[1]}/podcast_feed.xml")
     else:
         print("\n❌ RSS更新失敗")
+    return success
 
 
 if __name__ == "__main__":
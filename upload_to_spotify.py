@@ -1,7 +1,12 @@
+import argparse
 import os
 import glob
 from datetime import datetime
-import requests
+
+from audio_encoder import AUDIO_EXTENSIONS, audio_mime_type
+from episode_catalog import open_catalog
+from run_metrics import RunMetrics
+from show_config import resolve_show
 
 
 class SpotifyPodcastUploader:
@@ -22,9 +27,14 @@ class SpotifyPodcastUploader:
        - Buzzsprout, Transistor, Libsyn等を使用
     """
     
-    def __init__(self):
+    def __init__(self, show=None):
+        """show: 番組の設定（show_config参照）。省略時は既定のAIニュース番組"""
         self.access_token = os.environ.get("SPOTIFY_ACCESS_TOKEN")
         self.show_id = os.environ.get("SPOTIFY_SHOW_ID")
+        self.show = resolve_show(show)
+        self.metrics = RunMetrics(
+            "upload", labels={"show": self.show["name"]} if self.show["name"] else None
+        )
         
     def upload_via_rss(self, audio_file):
         """
@@ -34,17 +44,22 @@ class SpotifyPodcastUploader:
         1. 音声ファイルを公開可能な場所にアップロード (S3, GitHub Releases等)
         2. RSS XMLを更新
         3. Spotifyが自動的にクロール
+
+        アップロードできたかを返す（失敗した場合はRSSを更新しない）。
         """
         print("📡 RSS フィード方式でアップロード準備中...")
         
         # GitHub Releasesにアップロード
         audio_url = self.upload_to_github_releases(audio_file)
+        if not audio_url:
+            return False
         
         # RSS XMLを更新
         self.update_rss_feed(audio_file, audio_url)
         
         print("✅ RSSフィード更新完了")
         print("ℹ️  Spotifyが数時間以内に自動的にエピソードを取得します")
+        return True
         
     def upload_to_github_releases(self, audio_file):
         """GitHub Releasesに音声ファイルをアップロード"""
@@ -57,7 +72,8 @@ class SpotifyPodcastUploader:
         
         # タグ名を生成
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        tag_name = f"podcast-{timestamp}"
+        # 複数の番組のリリースのタグが重ならないよう番組名を含める
+        tag_name = f"podcast-{self.show['name']}-{timestamp}" if self.show["name"] else f"podcast-{timestamp}"
         
         # GitHub API エンドポイント
         api_url = f"https://api.github.com/repos/{repo}/releases"
@@ -76,6 +92,9 @@ class SpotifyPodcastUploader:
             "prerelease": False
         }
         
+        # requestsは実際にアップロードするときだけ読み込む（起動を速くするため）
+        import requests
+
         try:
             response = requests.post(api_url, json=release_data, headers=headers)
             response.raise_for_status()
@@ -89,11 +108,12 @@ class SpotifyPodcastUploader:
                     f"{upload_url}?name={os.path.basename(audio_file)}",
                     headers={
                         "Authorization": f"Bearer {github_token}",
-                        "Content-Type": "audio/wav"
+                        "Content-Type": audio_mime_type(audio_file)
                     },
                     data=f
                 )
                 asset_response.raise_for_status()
+            self.metrics.add("bytes_uploaded", os.path.getsize(audio_file))
                 
             audio_url = asset_response.json()["browser_download_url"]
             print(f"✅ GitHub Releasesにアップロード: {audio_url}")
@@ -134,7 +154,7 @@ class SpotifyPodcastUploader:
         
         enclosure = ET.SubElement(item, "enclosure")
         enclosure.set("url", audio_url or "")
-        enclosure.set("type", "audio/mpeg")
+        enclosure.set("type", audio_mime_type(audio_file))
         
         # ファイルサイズを取得
         if os.path.exists(audio_file):
@@ -169,29 +189,78 @@ class SpotifyPodcastUploader:
         
         return rss
     
+    def get_upload_targets(self):
+        """
+        未アップロードのエピソードをカタログから古い順に取得
+
+        カタログが空の場合は従来どおりファイルを走査して最新のものを使う。
+        """
+        catalog = open_catalog(self.show["catalog"] or None)
+        try:
+            if catalog.count():
+                episodes = catalog.unpublished("upload")
+                if not episodes:
+                    print("❌ 未アップロードのエピソードがありません")
+                return episodes
+        finally:
+            catalog.close()
+
+        audio_files = [
+            path for ext in AUDIO_EXTENSIONS
+            for path in glob.glob(os.path.join(self.show["output_dir"], f"podcast_*{ext}"))
+        ]
+        if not audio_files:
+            print("❌ 音声ファイルが見つかりません")
+            return []
+        return [{"id": None, "audio_path": max(audio_files, key=os.path.getctime)}]
+
     def run(self):
-        """メイン実行"""
+        """メイン実行（成否にかかわらず計測値を書き出す）"""
+        status = "failed"
+        try:
+            status = self._run()
+            return status
+        finally:
+            self.metrics.finish(status)
+
+    def _run(self):
         print("=" * 50)
         print("📤 Spotifyアップロード処理")
         print("=" * 50)
         
-        # 最新の音声ファイルを検索
-        audio_files = glob.glob("podcast_*.wav")
-        if not audio_files:
-            print("❌ 音声ファイルが見つかりません")
-            return
-        
-        latest_audio = max(audio_files, key=os.path.getctime)
-        print(f"📁 アップロード対象: {latest_audio}")
-        
-        # RSSフィード方式でアップロード
-        self.upload_via_rss(latest_audio)
+        # 未アップロードのエピソードを古い順にアップロード
+        # （失敗した場合は以降のエピソードも次回に回し、公開順を保つ）
+        episodes = self.get_upload_targets()
+        if not episodes:
+            return "no_episode"
+        for episode in episodes:
+            audio_file = episode["audio_path"]
+            print(f"📁 アップロード対象: {audio_file}")
+
+            # RSSフィード方式でアップロード
+            with self.metrics.stage("upload"):
+                uploaded = self.upload_via_rss(audio_file)
+            if not uploaded:
+                print("❌ アップロードに失敗しました")
+                return "failed"
+
+            if episode["id"] is not None:
+                catalog = open_catalog(self.show["catalog"] or None)
+                catalog.mark_published(episode["id"], "upload")
+                catalog.close()
         
         print("=" * 50)
         print("✅ アップロード処理完了")
         print("=" * 50)
+        return "success"
+
+
+def main(argv=None):
+    """アップロードを実行し、結果（success / no_episode / failed）を返す"""
+    parser = argparse.ArgumentParser(description="未アップロードのエピソードを古い順にアップロード")
+    parser.parse_args(argv)
+    return SpotifyPodcastUploader().run()
 
 
 if __name__ == "__main__":
-    uploader = SpotifyPodcastUploader()
-    uploader.run()
\ No newline at end of file
+    main()
\ No newline at end of file
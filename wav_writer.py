@@ -0,0 +1,85 @@
+import os
+import struct
+
+
+WAV_HEADER_SIZE = 44
+
+
+def wav_header(data_size, sample_rate, bits_per_sample=16, num_channels=1):
+    """PCM用の44バイトのWAVヘッダーを作成"""
+    bytes_per_sample = bits_per_sample // 8
+    block_align = num_channels * bytes_per_sample
+    byte_rate = sample_rate * block_align
+    chunk_size = 36 + data_size
+
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", chunk_size, b"WAVE", b"fmt ",
+        16, 1, num_channels, sample_rate,
+        byte_rate, block_align, bits_per_sample,
+        b"data", data_size
+    )
+
+
+class WavWriter:
+    """
+    メモリ使用量が一定のストリーミングWAVライター
+
+    仮のヘッダーを書いた後、受信した音声チャンクをそのままディスクに追記し、
+    close時にヘッダーのサイズ（と音声形式）を書き換える。
+    書き込み中は「<path>.part」に出力し、完了時にrenameするため、
+    途中で失敗しても不完全なファイルが残らない。
+    """
+
+    def __init__(self, path, sample_rate=24000, bits_per_sample=16, num_channels=1):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+        self.num_channels = num_channels
+        self.data_size = 0
+
+        self._part_path = f"{path}.part"
+        self._file = open(self._part_path, "wb")
+        self._file.write(wav_header(0, sample_rate, bits_per_sample, num_channels))
+
+    def set_format(self, sample_rate, bits_per_sample=16, num_channels=1):
+        """音声形式を設定（ヘッダーはclose時に書き込まれる）"""
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+        self.num_channels = num_channels
+
+    def write(self, data):
+        """音声データを追記"""
+        self._file.write(data)
+        self.data_size += len(data)
+
+    def close(self):
+        """ヘッダーを確定してファイルを完成させる"""
+        if self._file is None:
+            return
+        self._file.seek(0)
+        self._file.write(wav_header(
+            self.data_size, self.sample_rate, self.bits_per_sample, self.num_channels
+        ))
+        self._file.close()
+        self._file = None
+        os.replace(self._part_path, self.path)
+
+    def abort(self):
+        """書き込みを中止し、一時ファイルを削除"""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if os.path.exists(self._part_path):
+            os.remove(self._part_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False